@@ -6,5 +6,6 @@
 - License: MIT
 """
 
+from ggacha.record import GachaRecord
 from ggacha.wish import GachaWish
 from ggacha.player import GachaPlayer
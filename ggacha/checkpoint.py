@@ -0,0 +1,173 @@
+from json import dumps, loads
+from json.decoder import JSONDecodeError
+from os import fsync, remove
+from os.path import isfile
+from threading import Lock
+from typing import Dict, Tuple, Union
+
+
+class WishProgress:
+    def __init__(self) -> None:
+        """某一祈愿卡池在检查点日志中的获取进度。"""
+
+        self.page = 0
+        """已经获取到的最后一页的页码。为0表示还没有开始。"""
+
+        self.end_id = '0'
+        """已经获取到的最后一页的翻页游标。"""
+
+        self.records = list()
+        """已经获取到的原始抽卡记录（从新到旧）。"""
+
+        self.done = False
+        """是否已经获取完毕。"""
+
+    def __repr__(self) -> str:
+        return '<%s 页码：%i，记录数量：%i，%s>' % (
+            self.__class__.__name__,
+            self.page,
+            len(self.records),
+            '已完成' if self.done else '未完成',
+        )
+
+
+class Checkpoint:
+    _VERSION = 2
+    """检查点日志的格式版本。"""
+
+    def __init__(self,
+                 file: str,
+                 language: str = '',
+                 region: str = '',
+                 uid: str = '',
+                 since: Union[Dict[str, str], None] = None,
+                 ) -> None:
+        """获取抽卡记录时的检查点日志。
+
+        日志是只追加的 JSON Lines 文件，每获取一页记录就追加一行，
+        记录卡池类型、页码、翻页游标以及这一页的原始抽卡记录；卡池获取完毕时再追加一行完成标记。
+        获取过程意外中断后，凭这份日志可以从最后的游标处继续，而不必从第一页重新获取。
+
+        :param file: 日志文件的地址。
+        :param language: 抽卡记录的语言文字。与日志中记载的不一致时，日志作废。
+        :param region: 游戏地区的缩写。与日志中记载的不一致时，日志作废。
+        :param uid: 玩家的游戏账号号码。与日志中记载的不一致、或者日志中的抽卡记录属于其他玩家时，日志作废，
+                    以免把另一个账号中断的进度续接到当前账号上。为空字符串表示账号没有任何抽卡记录，
+                    此时记载了抽卡记录的日志同样作废。
+        :param since: 增量同步的起点，即 ``{gacha_type: 最新一条记录的ID}`` 。与日志中记载的不一致时，日志作废。
+        """
+        self.file = file
+        """日志文件的地址。"""
+
+        self.language = language
+        """抽卡记录的语言文字。"""
+
+        self.region = region
+        """游戏地区的缩写。"""
+
+        self.uid = uid
+        """玩家的游戏账号号码。"""
+
+        self.since = dict() if since is None else dict(since)
+        """增量同步的起点。"""
+
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return '<%s %s>' % (self.__class__.__name__, self.file)
+
+    def _header(self) -> dict:
+        return {
+            'version': self._VERSION,
+            'lang': self.language,
+            'region': self.region,
+            'uid': self.uid,
+            'since': self.since,
+        }
+
+    def read(self) -> Dict[str, WishProgress]:
+        """读取日志，还原各个祈愿卡池的获取进度。
+
+        日志不存在、格式版本不同、与当前的语言、地区、UID、增量同步的起点不一致，
+        或者其中的抽卡记录属于其他玩家时，视为没有任何进度。
+        末尾因中断而写了一半的行会被忽略。
+
+        :return: 以祈愿卡池类型为键的获取进度。
+        """
+        return self._scan()[0]
+
+    def _scan(self) -> Tuple[Dict[str, WishProgress], int]:
+        """读取日志，同时返回最后一个完整的行的结尾在文件中的位置。日志无效时位置为0。"""
+        result = dict()
+        if not isfile(self.file):
+            return result, 0
+        end = 0
+        with open(self.file, 'rb') as f:
+            for i, line in enumerate(f):
+                if not line.endswith(b'\n'):
+                    break  # 写了一半的行。
+                try:
+                    entry = loads(line.decode('UTF-8'))
+                except (UnicodeDecodeError, JSONDecodeError):
+                    break
+                if i == 0:
+                    if entry != self._header():
+                        return dict(), 0
+                    end += len(line)
+                    continue
+                progress = result.setdefault(entry['wish'], WishProgress())
+                if entry.get('done', False):
+                    progress.done = True
+                    end += len(line)
+                    continue
+                if any(record.get('uid') != self.uid for record in entry['records']):
+                    return dict(), 0
+                progress.page = entry['page']
+                progress.end_id = entry['end_id']
+                progress.records += entry['records']
+                end += len(line)
+        return result, end
+
+    def open(self) -> None:
+        """开始记录。日志无效时会重新创建，并写入表头；
+        日志有效时则截掉末尾因中断而写了一半的行，之后的记录从完整的行之后继续追加。
+        """
+        with self._lock:
+            progress, end = self._scan()
+            if len(progress) > 0:
+                with open(self.file, 'r+b') as f:
+                    f.truncate(end)
+                return
+            with open(self.file, 'w', encoding='UTF-8') as f:
+                f.write(dumps(self._header()) + '\n')
+
+    def _append(self, entry: dict) -> None:
+        line = dumps(entry, ensure_ascii=False) + '\n'
+        with self._lock:
+            with open(self.file, 'a', encoding='UTF-8') as f:
+                f.write(line)
+                f.flush()
+                fsync(f.fileno())
+
+    def append(self, wish_type: str, page: int, end_id: str, records: list) -> None:
+        """追加一页抽卡记录。
+
+        :param wish_type: 祈愿卡池类型。
+        :param page: 页码。
+        :param end_id: 这一页的翻页游标。
+        :param records: 这一页的原始抽卡记录。
+        """
+        self._append({'wish': wish_type, 'page': page, 'end_id': end_id, 'records': records})
+
+    def finish(self, wish_type: str) -> None:
+        """标记某一祈愿卡池已经获取完毕。
+
+        :param wish_type: 祈愿卡池类型。
+        """
+        self._append({'wish': wish_type, 'done': True})
+
+    def remove(self) -> None:
+        """删除日志文件。"""
+        with self._lock:
+            if isfile(self.file):
+                remove(self.file)
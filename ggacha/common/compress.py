@@ -0,0 +1,53 @@
+import gzip
+import lzma
+from os.path import splitext
+from typing import IO
+
+_EXTENSIONS = {
+    '.gz': gzip.open,
+    '.gzip': gzip.open,
+    '.xz': lzma.open,
+    '.lzma': lzma.open,
+}
+"""按扩展名选择写入时的压缩格式。"""
+
+_MAGICS = (
+    (b'\x1f\x8b', gzip.open),
+    (b'\xfd7zXZ\x00', lzma.open),
+)
+"""按文件头选择读取时的压缩格式。"""
+
+_LEVELS = {
+    gzip.open: {'compresslevel': 6},
+    lzma.open: {'preset': 3},
+}
+"""压缩等级。抽卡记录高度重复，更高的等级只会大幅增加耗时，体积却相差无几。"""
+
+
+def is_compressed(file: str) -> bool:
+    """根据文件头判断文件是否经过压缩。"""
+    with open(file, 'rb') as f:
+        head = f.read(max(len(magic) for magic, _ in _MAGICS))
+    return any(head.startswith(magic) for magic, _ in _MAGICS)
+
+
+def open_text(file: str, mode: str = 'r') -> IO[str]:
+    """以UTF-8文本方式打开一个可能经过压缩的文件，读写都是流式的。
+
+    - 读取时根据文件头识别 gzip 和 xz 格式，与扩展名无关；
+    - 写入时根据扩展名选择格式： ``.gz`` 、 ``.gzip`` 为 gzip， ``.xz`` 、 ``.lzma`` 为 xz，其余不压缩。
+
+    :param file: 文件地址。
+    :param mode: ``'r'`` 、 ``'w'`` 或 ``'a'`` 。
+    """
+    if mode == 'r':
+        with open(file, 'rb') as f:
+            head = f.read(max(len(magic) for magic, _ in _MAGICS))
+        for magic, opener in _MAGICS:
+            if head.startswith(magic):
+                return opener(file, 'rt', encoding='UTF-8')
+    else:
+        opener = _EXTENSIONS.get(splitext(file)[1].lower())
+        if opener is not None:
+            return opener(file, mode + 't', encoding='UTF-8', **_LEVELS[opener])
+    return open(file, mode, encoding='UTF-8')
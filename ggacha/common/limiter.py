@@ -0,0 +1,79 @@
+from threading import Lock
+from time import monotonic, sleep
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        """令牌桶限流器。
+
+        令牌以每秒 ``rate`` 个的速度生成，最多积攒 ``capacity`` 个；
+        每次请求前调用 :meth:`acquire` 取走令牌，令牌不足时阻塞等待。
+        可以在多个线程之间共享同一个实例。
+
+        :param rate: 每秒生成的令牌数量，即长期平均的请求频率上限。
+        :param capacity: 令牌桶容量，即允许的最大突发请求数量。
+        """
+        if rate <= 0:
+            raise ValueError('令牌生成速度必须大于0，而提供的是 %s' % rate)
+        if capacity < 1:
+            raise ValueError('令牌桶容量不能小于1，而提供的是 %s' % capacity)
+
+        self.rate = rate
+        """每秒生成的令牌数量。"""
+
+        self.capacity = capacity
+        """令牌桶容量。"""
+
+        self._tokens = capacity
+        self._stamp = monotonic()
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return '<%s 速度：%s/s，容量：%s>' % (
+            self.__class__.__name__,
+            self.rate,
+            self.capacity,
+        )
+
+    def acquire(self, tokens: float = 1) -> None:
+        """取走令牌，令牌不足时阻塞直到令牌足够。
+
+        令牌在加锁期间预先扣除（允许欠账），等待发生在锁外，
+        因此多个线程会按调用顺序依次获得令牌，而不会互相饿死。
+
+        :param tokens: 需要取走的令牌数量。
+        """
+        with self._lock:
+            now = monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0
+        if wait > 0:
+            sleep(wait)
+
+
+class LimiterChain:
+    def __init__(self, *limiters) -> None:
+        """将多个限流器串联起来，取令牌时必须依次从每一个限流器中取得。
+
+        比如可以同时施加全局的和针对某个服务器的频率限制。
+
+        :param limiters: 任意数量的提供了 ``acquire()`` 方法的限流器。
+        """
+        self.limiters = limiters
+        """串联的所有限流器。"""
+
+    def __repr__(self) -> str:
+        return '<%s %s>' % (
+            self.__class__.__name__,
+            ', '.join(repr(limiter) for limiter in self.limiters),
+        )
+
+    def acquire(self, tokens: float = 1) -> None:
+        """依次从每一个限流器中取走令牌。
+
+        :param tokens: 需要取走的令牌数量。
+        """
+        for limiter in self.limiters:
+            limiter.acquire(tokens)
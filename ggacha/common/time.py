@@ -1,12 +1,127 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Iterable, List
 
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+"""抽卡记录和卡池历史中时间字符串的固定格式。"""
 
-def str_to_stamp(s: str) -> float:
+HISTORY_OFFSET = 8 * 3600
+"""卡池历史（``WISHES_HISTORY``）中的时间所在时区相对于UTC的偏移秒数，即UTC+8。"""
+
+REGION_OFFSETS = {
+    'cn_gf01': 8 * 3600,  # 天空岛
+    'cn_qd01': 8 * 3600,  # 世界树
+    'os_asia': 8 * 3600,
+    'os_cht': 8 * 3600,
+    'os_euro': 1 * 3600,
+    'os_usa': -5 * 3600,
+}
+"""各个游戏地区的抽卡时间相对于UTC的偏移秒数。详见游戏内祈愿面板的说明。"""
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def parse_offset(s: str) -> int:
+    """将 “+08:00:00” 或 “-05:00” 格式的时区字符串转换为偏移秒数。"""
+    sign = -1 if s.startswith('-') else 1
+    parts = [int(p) for p in s.lstrip('+-').split(':')] + [0, 0]
+    return sign * (parts[0] * 3600 + parts[1] * 60 + parts[2])
+
+
+def region_offset(region: str) -> int:
+    """获取某个游戏地区的抽卡时间相对于UTC的偏移秒数。未知的地区视为UTC+8。"""
+    return REGION_OFFSETS.get(region, HISTORY_OFFSET)
+
+
+def _days(y: int, m: int, d: int) -> int:
+    """公历日期距离1970年1月1日的天数。"""
+    y -= m <= 2
+    era = y // 400
+    yoe = y - era * 400
+    doy = (153 * (m + (-3 if m > 2 else 9)) + 2) // 5 + d - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+
+@lru_cache(maxsize=1 << 16)
+def parse_time(s: str, offset: int = 0) -> int:
+    """将 “YYYY-mm-dd HH:MM:SS” 格式的时间字符串转换为时间戳（整数秒）。
+
+    按固定位置切片解析，而不经过 ``strptime`` ；结果会被缓存，十连抽出的记录时间相同，只需解析一次。
+
+    :param s: 时间字符串。
+    :param offset: 时间字符串所在时区相对于UTC的偏移秒数。
+    :raise ValueError: 时间字符串的格式不正确。
+    """
+    if len(s) != 19 or s[4] != '-' or s[7] != '-' or s[10] != ' ' or s[13] != ':' or s[16] != ':':
+        raise ValueError('时间字符串的格式不正确：%r' % s)
+    y, m, d = int(s[0:4]), int(s[5:7]), int(s[8:10])
+    hh, mm, ss = int(s[11:13]), int(s[14:16]), int(s[17:19])
+    if not (1 <= m <= 12 and 1 <= d <= 31 and hh < 24 and mm < 60 and ss < 60):
+        raise ValueError('时间字符串的格式不正确：%r' % s)
+    return ((_days(y, m, d) * 24 + hh) * 60 + mm) * 60 + ss - offset
+
+
+@lru_cache(maxsize=1 << 16)
+def format_time(t: int, offset: int = 0) -> str:
+    """将时间戳（整数秒）转换为 “YYYY-mm-dd HH:MM:SS” 格式的时间字符串。
+
+    :param t: 时间戳。
+    :param offset: 目标时区相对于UTC的偏移秒数。
+    """
+    return str(_EPOCH + timedelta(seconds=t + offset))
+
+
+def parse_times(strings: Iterable[str], offset: int = 0) -> List[int]:
+    """批量转换时间字符串，比如一个祈愿卡池的所有抽卡时间。
+
+    :param strings: 时间字符串。
+    :param offset: 时间字符串所在时区相对于UTC的偏移秒数。
+    :return: 一一对应的时间戳（整数秒）。
+    """
+    memo = dict()
+    result = []
+    for s in strings:
+        t = memo.get(s)
+        if t is None:
+            t = memo[s] = parse_time(s, offset)
+        result.append(t)
+    return result
+
+
+def format_times(stamps: Iterable[int], offset: int = 0) -> List[str]:
+    """批量转换时间戳，是 ``parse_times()`` 的逆运算。
+
+    :param stamps: 时间戳（整数秒）。
+    :param offset: 目标时区相对于UTC的偏移秒数。
+    :return: 一一对应的时间字符串。
+    """
+    memo = dict()
+    result = []
+    for t in stamps:
+        s = memo.get(t)
+        if s is None:
+            s = memo[t] = format_time(int(t), offset)
+        result.append(s)
+    return result
+
+
+def str_to_stamp(s: str, offset: int = HISTORY_OFFSET) -> float:
+    """将时间字符串转换为时间戳。格式不正确时返回0。
+
+    :param s: 时间字符串。
+    :param offset: 时间字符串所在时区相对于UTC的偏移秒数。默认与卡池历史相同。
+    """
     try:
-        return datetime.strptime(s, '%Y-%m-%d %H:%M:%S').timestamp()
+        return float(parse_time(s, offset))
     except ValueError:
         return 0
 
 
-def stamp_to_str(t: float) -> str:
-    return datetime.fromtimestamp(t).strftime('%Y-%m-%d %H:%M:%S')
+def stamp_to_str(t: float, offset: int = HISTORY_OFFSET) -> str:
+    """将时间戳转换为时间字符串。
+
+    :param t: 时间戳。
+    :param offset: 目标时区相对于UTC的偏移秒数。默认与卡池历史相同。
+    """
+    return format_time(int(t // 1), offset)
@@ -1 +1,26 @@
-from ggacha.ext.storage import save_as_xlsx
+from importlib import import_module
+
+_EXPORTS = {
+    'save_as_xlsx': 'ggacha.ext.storage',
+    'ReplayServer': 'ggacha.ext.replay',
+    'BatchCollector': 'ggacha.ext.batch',
+    'SqliteStorage': 'ggacha.ext.sqlite',
+    'save_as_binary': 'ggacha.ext.binary',
+    'load_binary': 'ggacha.ext.binary',
+    'WishColumns': 'ggacha.ext.columns',  # 需要安装 NumPy 。
+}
+"""各扩展功能所在的模块。扩展模块依赖的 xlsxwriter 、 sqlite3 、 NumPy 等导入较慢，只在第一次访问时导入。"""
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    value = getattr(import_module(_EXPORTS[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
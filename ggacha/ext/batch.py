@@ -0,0 +1,148 @@
+from concurrent.futures import ThreadPoolExecutor
+from os import makedirs
+from os.path import isfile, join
+from threading import Lock
+from typing import Callable, Dict, Iterable, Union
+from urllib.parse import urlparse
+
+from ggacha import GachaPlayer
+from ggacha.common.limiter import TokenBucket, LimiterChain
+from ggacha.transport import GachaTransport
+
+
+class BatchCollector:
+    def __init__(self,
+                 directory: str = './raw',
+                 workers: int = 4,
+                 rate: float = 10,
+                 host_rate: float = 5,
+                 burst: float = 5,
+                 handler: Callable = None,
+                 **kwargs,
+                 ) -> None:
+        """多账号抽卡记录的批量获取调度器。
+
+        在线程池中同时获取多个账号的抽卡记录，每个账号的记录合并到
+        ``{directory}/ggr_{uid}.json`` 存档中（不存在时新建）。
+        如果事先能得知账号的UID且存档已经存在，则只获取存档之后新增的记录。
+
+        所有账号共用一个全局限流器，请求同一个服务器的账号还共用一个针对该服务器的限流器，
+        因此总耗时取决于并发数量和频率限制，而不是账号数量。
+
+        :param directory: 存档所在的文件夹。
+        :param workers: 同时获取的账号数量。
+        :param rate: 所有账号合计每秒最多发出的请求数量。
+        :param host_rate: 对同一个服务器每秒最多发出的请求数量。
+        :param burst: 限流器允许的最大突发请求数量。
+        :param handler: 可选。接收进度通知的函数。除了 ``GachaPlayer`` 原有的参数之外，
+                        还会以关键字参数 ``source`` 传入对应账号的日志文件地址或URL。
+        :param kwargs: 传给每一个 ``GachaPlayer`` 的其余参数，比如TNF策略、``api_url`` 等。
+                       不提供 ``transport`` 时所有账号共用一个连接池大小与并发数量相当的传输层。
+        """
+        self.directory = directory
+        """存档所在的文件夹。"""
+
+        self.workers = workers
+        """同时获取的账号数量。"""
+
+        self.handler = handler if callable(handler) else None
+        """接收进度通知的函数。"""
+
+        self.limiter = TokenBucket(rate, burst)
+        """所有账号共用的全局限流器。"""
+
+        self.host_rate = host_rate
+        """对同一个服务器每秒最多发出的请求数量。"""
+
+        self.burst = burst
+        """限流器允许的最大突发请求数量。"""
+
+        if 'transport' not in kwargs:
+            kwargs['transport'] = GachaTransport(pool_size=max(4, workers * 2))
+        self._kwargs = kwargs
+        self._hosts = dict()
+        self._uids = dict()
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return '<%s %s 并发：%i，限流：%s>' % (
+            self.__class__.__name__,
+            self.directory,
+            self.workers,
+            self.limiter,
+        )
+
+    def _host_limiter(self, host: str) -> TokenBucket:
+        """获取针对某个服务器的限流器。"""
+        with self._lock:
+            if host not in self._hosts:
+                self._hosts[host] = TokenBucket(self.host_rate, self.burst)
+            return self._hosts[host]
+
+    def _uid_lock(self, uid: str) -> Lock:
+        """获取某个存档的锁，避免同一个UID的两个来源同时写入同一份存档。"""
+        with self._lock:
+            if uid not in self._uids:
+                self._uids[uid] = Lock()
+            return self._uids[uid]
+
+    def _handler_of(self, source: str) -> Union[Callable, None]:
+        if self.handler is None:
+            return None
+
+        def handler(code: int, message: str, **kwargs) -> None:
+            with self._lock:
+                self.handler(code, message, source=source, **kwargs)
+
+        return handler
+
+    def collect(self, source: str) -> str:
+        """获取一个账号的抽卡记录，并合并到它的存档中。
+
+        :param source: 原神日志文件的地址，或者带有 authkey 等参数的祈愿历史记录URL。
+        :return: 存档的文件地址。
+        """
+        player = GachaPlayer(handler=self._handler_of(source), **self._kwargs)
+        self.limiter.acquire(2)  # 初始化时需要请求两次接口。
+        if isfile(source):
+            player.init(log_path=source)
+        else:
+            player.init(url=source)
+        player.limiter = LimiterChain(self.limiter, self._host_limiter(urlparse(player.api).netloc))
+
+        collected = False
+        if player.uid == '':  # 事先无法得知UID，只能全部获取。
+            player.collect()
+            collected = True
+
+        path = join(self.directory, 'ggr_{uid}.json'.format(uid=player.uid))
+        with self._uid_lock(player.uid):
+            master = GachaPlayer(file=path, **self._kwargs) if isfile(path) else None
+            if not collected:
+                player.collect(since=master)
+            if master is None:
+                master = player
+            else:
+                master += player
+            master.dump(path)
+        return path
+
+    def run(self, sources: Iterable[str]) -> Dict[str, Union[str, Exception]]:
+        """批量获取多个账号的抽卡记录。
+
+        某个账号获取失败不会影响其它账号。
+
+        :param sources: 各个账号的原神日志文件地址或者祈愿历史记录URL。
+        :return: 以来源为键的字典，值为存档的文件地址，或者获取失败时抛出的异常。
+        """
+        makedirs(self.directory, exist_ok=True)
+        sources = list(sources)
+        result = dict()
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(self.collect, source) for source in sources]
+            for source, future in zip(sources, futures):
+                try:
+                    result[source] = future.result()
+                except Exception as e:
+                    result[source] = e
+        return result
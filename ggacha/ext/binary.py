@@ -0,0 +1,180 @@
+from array import array
+from json import dumps, loads
+from mmap import mmap, ACCESS_READ
+from operator import itemgetter
+from struct import Struct
+from sys import byteorder
+from typing import Dict, List
+
+from ggacha import GachaPlayer
+from ggacha.common.time import format_times, parse_time
+
+_MAGIC = b'GGACHA\x00B'
+"""二进制存档的文件头标识。"""
+
+_VERSION = 1
+"""二进制存档的格式版本。"""
+
+_PREFIX = Struct('<8sI')
+"""文件头：标识、元数据长度。"""
+
+_ALIGN = 8
+"""每一列数据的起始位置按此字节数对齐。"""
+
+_COLUMNS = itemgetter('id', 'time', 'name', 'item_type', 'rank_type')
+"""二进制存档保存的抽卡记录字段。"""
+
+
+def _padding(size: int, fill: bytes = b'\0') -> bytes:
+    return fill * (-size % _ALIGN)
+
+
+def _column(typecode: str, values) -> bytes:
+    """将一列整数编码为小端序的定长二进制数据。"""
+    a = array(typecode, values)
+    if byteorder != 'little':
+        a.byteswap()
+    return a.tobytes()
+
+
+def _read_column(buffer, typecode: str, offset: int, count: int) -> array:
+    """从 ``buffer`` 中读取一列小端序的定长整数。"""
+    a = array(typecode)
+    a.frombytes(buffer[offset:offset + count * a.itemsize])
+    if byteorder != 'little':
+        a.byteswap()
+    return a
+
+
+def save_as_binary(obj: GachaPlayer, file: str) -> None:
+    """将抽卡记录保存为按列存储的二进制存档。
+
+    每个祈愿卡池各占一节，每节依次存放五列数据：ID和抽卡时间（秒）为64位整数，
+    名称、类别、星级则编码为字符串表中的16位序号。存档的元数据（包括字符串表和各节的位置）
+    以JSON格式存放在文件开头。
+
+    抽卡记录中只有 ``id`` 、 ``time`` 、 ``name`` 、 ``item_type`` 、 ``rank_type`` 五个字段会被保存。
+
+    :param obj: 需要保存的玩家数据。
+    :param file: 存档的文件地址。
+    """
+    strings = dict()
+    times = dict()
+    sections = dict()
+    blocks = []
+    offset = 0
+    for wish in obj.wishes:
+        columns = list(zip(*map(_COLUMNS, wish.records))) or [(), (), (), (), ()]
+        ids, stamps, names, item_types, ranks = columns
+        for t in stamps:
+            if t not in times:
+                times[t] = parse_time(t)
+        for s in names + item_types + ranks:
+            strings.setdefault(s, len(strings))
+        sections[wish.wish_type] = {'offset': offset, 'count': len(ids)}
+        for typecode, values in (
+                ('q', map(int, ids)),
+                ('q', map(times.__getitem__, stamps)),
+                ('H', map(strings.__getitem__, names)),
+                ('H', map(strings.__getitem__, item_types)),
+                ('H', map(strings.__getitem__, ranks)),
+        ):
+            block = _column(typecode, values)
+            blocks.append(block + _padding(len(block)))
+            offset += len(blocks[-1])
+    if len(strings) > 0xFFFF:
+        raise ValueError('字符串表过大（%i），无法保存为二进制存档。' % len(strings))
+
+    header = dumps({
+        'version': _VERSION,
+        'collector': {'version': GachaPlayer.VERSION, 'create': obj.create, 'modify': obj.modify},
+        'infos': {'uid': obj.uid, 'lang': obj.language, 'region': obj.region},
+        'wishes': obj.map_wishes(),
+        'strings': list(strings),
+        'sections': sections,
+    }, ensure_ascii=False).encode('UTF-8')
+    header += _padding(_PREFIX.size + len(header), b' ')  # 以JSON空白补齐。
+    with open(file, 'wb') as f:
+        f.write(_PREFIX.pack(_MAGIC, len(header)))
+        f.write(header)
+        for block in blocks:
+            f.write(block)
+
+
+class _Sections:
+    def __init__(self, buffer: mmap, base: int, strings: List[str], sections: Dict[str, dict]) -> None:
+        """二进制存档中尚未解码的各节。所有节都解码之后关闭内存映射。"""
+        self.buffer = buffer
+        self.base = base
+        self.strings = strings
+        self.pending = {k: v for k, v in sections.items() if v['count'] > 0}
+        if len(self.pending) == 0:
+            self.buffer.close()
+
+    def loader(self, wish_type: str):
+        return lambda: self.decode(wish_type)
+
+    def decode(self, wish_type: str) -> List[dict]:
+        section = self.pending.pop(wish_type)
+        count = section['count']
+        offset = self.base + section['offset']
+        columns = []
+        for typecode in 'qqHHH':
+            columns.append(_read_column(self.buffer, typecode, offset, count))
+            size = count * columns[-1].itemsize
+            offset += size + (-size % _ALIGN)
+        if len(self.pending) == 0:
+            self.buffer.close()
+
+        ids, stamps, names, item_types, ranks = columns
+        strings = self.strings
+        return [
+            {'time': t, 'name': strings[n], 'item_type': strings[k], 'rank_type': strings[r], 'id': i}
+            for i, t, n, k, r in zip(ids, format_times(stamps), names, item_types, ranks)
+        ]
+
+
+def load_binary(file: str, **kwargs) -> GachaPlayer:
+    """通过内存映射载入二进制存档。
+
+    元数据立即可用，每个祈愿卡池的抽卡记录则在第一次访问时才解码，
+    因此只读取元数据或个别卡池时几乎没有开销。
+
+    :param file: 存档的文件地址。
+    :param kwargs: 传给 ``GachaPlayer`` 的其余参数，比如TNF策略。
+    :return: 玩家数据。
+    """
+    with open(file, 'rb') as f:
+        buffer = mmap(f.fileno(), 0, access=ACCESS_READ)
+    magic, size = _PREFIX.unpack_from(buffer)
+    if magic != _MAGIC:
+        buffer.close()
+        raise ValueError('%s 不是二进制抽卡记录存档。' % file)
+    meta = loads(buffer[_PREFIX.size:_PREFIX.size + size].decode('UTF-8'))
+    if meta['version'] != _VERSION:
+        buffer.close()
+        raise ValueError('不支持的二进制存档版本：%s' % meta['version'])
+
+    player = GachaPlayer(**kwargs)
+    player.create = meta['collector']['create']
+    player.modify = meta['collector']['modify']
+    player.uid = meta['infos']['uid']
+    player.language = meta['infos']['lang']
+    player.region = meta['infos']['region']
+    player._sync_infos()
+    sections = _Sections(buffer, _PREFIX.size + size, meta['strings'], meta['sections'])
+    for wish in player.wishes:
+        wish.wish_name = meta['wishes'].get(wish.wish_type, '')
+        if wish.wish_type in sections.pending:
+            wish.defer(sections.loader(wish.wish_type))
+    return player
+
+
+def json_to_binary(src: str, dst: str) -> None:
+    """将JSON格式的抽卡记录文件转换为二进制存档。"""
+    save_as_binary(GachaPlayer(file=src), dst)
+
+
+def binary_to_json(src: str, dst: str) -> None:
+    """将二进制存档转换为JSON格式的抽卡记录文件。"""
+    load_binary(src).dump(dst)
@@ -0,0 +1,178 @@
+from typing import Dict, List, Tuple, Union
+
+import numpy as np
+
+from ggacha import GachaWish
+from ggacha.common.time import parse_time
+from ggacha.record import GachaRecord
+
+_BUCKETS = {
+    'hour': 'datetime64[h]',
+    'day': 'datetime64[D]',
+    'week': 'datetime64[W]',
+    'month': 'datetime64[M]',
+    'year': 'datetime64[Y]',
+}
+"""``bucket()`` 支持的时间粒度。"""
+
+
+class WishColumns:
+    def __init__(self, wish: GachaWish) -> None:
+        """祈愿卡池抽卡记录的列式视图，基于 NumPy 提供向量化的筛选、分组与保底计算。
+
+        视图的每一列都与 ``wish.records`` 一一对应（顺序相同）：
+
+        - ``ids`` ：抽卡记录ID，int64；
+        - ``stamps`` ：抽卡时间，int64，是将时间字符串视为UTC+0时间得到的整数秒，与 ``GachaRecord.stamp`` 一致；
+        - ``ranks`` ：星级，int8；
+        - ``codes`` ：名称在 ``names`` 中的序号，int32。
+
+        每次访问列时都会检查 ``wish.records`` 是否变化：仍是同一个列表、没有被修改（见 ``GachaWish.revision`` ）
+        且只在末尾追加了记录时，只转换新增的部分；否则整个重建。
+
+        :param wish: 祈愿卡池。
+        """
+        self.wish = wish
+        """对应的祈愿卡池。"""
+
+        self.names = []
+        """所有出现过的角色/武器名称。"""
+
+        self._codes = dict()
+        self._records = None
+        self._revision = None
+        self._length = 0
+        self._first = None
+        self._last = None
+        self._columns = None
+
+    def __repr__(self) -> str:
+        return '<%s(%s) 记录数量：%i>' % (
+            self.__class__.__name__,
+            self.wish.wish_type,
+            len(self),
+        )
+
+    def __len__(self) -> int:
+        return len(self._sync()[0])
+
+    def _convert(self, records: List[dict]) -> Tuple[np.ndarray, ...]:
+        codes = self._codes
+        for record in records:
+            if record['name'] not in codes:
+                codes[record['name']] = len(self.names)
+                self.names.append(record['name'])
+        return (
+            np.fromiter((int(r['id']) for r in records), dtype=np.int64, count=len(records)),
+            np.fromiter(
+                (r.stamp if type(r) is GachaRecord else parse_time(r['time']) for r in records),
+                dtype=np.int64, count=len(records),
+            ),
+            np.fromiter((int(r['rank_type']) for r in records), dtype=np.int8, count=len(records)),
+            np.fromiter((codes[r['name']] for r in records), dtype=np.int32, count=len(records)),
+        )
+
+    def _sync(self) -> Tuple[np.ndarray, ...]:
+        records = self.wish.records
+        same = (records is self._records
+                and self.wish.revision == self._revision
+                and len(records) >= self._length > 0
+                and records[0] is self._first
+                and records[self._length - 1] is self._last)
+        if same and len(records) == self._length:
+            return self._columns
+        if same:
+            tail = self._convert(records[self._length:])
+            self._columns = tuple(np.concatenate(pair) for pair in zip(self._columns, tail))
+        else:
+            self._columns = self._convert(records)
+        self._records = records
+        self._revision = self.wish.revision
+        self._length = len(records)
+        self._first = records[0] if len(records) != 0 else None
+        self._last = records[-1] if len(records) != 0 else None
+        return self._columns
+
+    @property
+    def ids(self) -> np.ndarray:
+        """抽卡记录ID。"""
+        return self._sync()[0]
+
+    @property
+    def stamps(self) -> np.ndarray:
+        """抽卡时间（整数秒）。"""
+        return self._sync()[1]
+
+    @property
+    def ranks(self) -> np.ndarray:
+        """星级。"""
+        return self._sync()[2]
+
+    @property
+    def codes(self) -> np.ndarray:
+        """名称在 ``names`` 中的序号。"""
+        return self._sync()[3]
+
+    def order(self) -> np.ndarray:
+        """按抽卡时间（其次按ID）排序的下标，与 ``GachaWish.sort()`` 的顺序一致。"""
+        ids, stamps = self._sync()[:2]
+        return np.lexsort((ids, stamps))
+
+    def filter(self, rank: int = None, name: str = None) -> List[dict]:
+        """按星级和名称筛选抽卡记录。
+
+        :param rank: 可选。星级。
+        :param name: 可选。角色或武器的名称。
+        :return: 符合条件的抽卡记录，顺序与 ``wish.records`` 相同。
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if rank is not None:
+            mask &= self.ranks == int(rank)
+        if name is not None:
+            mask &= self.codes == self._codes.get(name, -1)
+        records = self.wish.records
+        return [records[i] for i in np.flatnonzero(mask)]
+
+    def bucket(self, period: Union[str, int] = 'day', rank: int = None) -> Dict[str, int]:
+        """按时间分组统计抽卡次数。
+
+        :param period: 时间粒度。可以是 ``'hour'`` 、 ``'day'`` 、 ``'week'`` 、 ``'month'`` 、 ``'year'`` ，
+                       也可以是以秒为单位的整数。
+        :param rank: 可选。只统计某一星级。
+        :return: 以每组的起始时间字符串为键、抽卡次数为值的字典，按时间先后排列。
+        """
+        stamps = self.stamps
+        if rank is not None:
+            stamps = stamps[self.ranks == int(rank)]
+        if isinstance(period, int):
+            keys = (stamps // period * period).astype('datetime64[s]')
+        else:
+            keys = stamps.astype('datetime64[s]').astype(_BUCKETS[period])
+        keys, counts = np.unique(keys, return_counts=True)
+        return dict(zip(np.datetime_as_string(keys).tolist(), counts.tolist()))
+
+    def pity(self, rank: int = 5) -> np.ndarray:
+        """计算每一条抽卡记录在保底内是第几抽。
+
+        按抽卡时间的先后计算，即与 ``save_as_xlsx()`` 中的 “保底内第几抽” 相同：
+        抽出星级不低于 ``rank`` 的记录之后，下一抽重新从1开始计数。
+
+        :param rank: 保底针对的星级。比如 ``4`` 表示四星保底（五星同样会重置计数）。
+        :return: 与 ``wish.records`` 一一对应的保底抽数。
+        """
+        order = self.order()
+        hit = self.ranks[order] >= rank
+        index = np.arange(len(order))
+        last = np.maximum.accumulate(np.where(hit, index, -1))
+        last = np.concatenate(([-1], last[:-1]))
+        result = np.empty(len(order), dtype=np.int64)
+        result[order] = index - last
+        return result
+
+    def pity_histogram(self, rank: int = 5) -> np.ndarray:
+        """统计抽出星级不低于 ``rank`` 的记录时的保底抽数分布。
+
+        :return: 下标为保底抽数、值为次数的数组。
+        """
+        pity = self.pity(rank)
+        return np.bincount(pity[self.ranks >= rank], minlength=1)
@@ -0,0 +1,353 @@
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from json import dumps
+from random import Random
+from threading import Thread, Lock
+from time import sleep
+from typing import Dict, List, Union
+from urllib.parse import urlparse, urlencode, parse_qsl
+
+from ggacha import GachaPlayer
+import ggacha.res as res
+from ggacha.res.index import ITEM_TYPES
+
+_WISH_NAMES = {
+    '100': '新手祈愿',
+    '200': '常驻祈愿',
+    '301': '角色活动祈愿',
+    '302': '武器活动祈愿',
+}
+_WISH_IDS = {'100': '14', '200': '4', '301': '15', '302': '16'}
+
+
+def _item_rank(code: str) -> int:
+    """根据项目自定义编号推算物品星级。编号规则详见 README 。"""
+    if code[1] in 'ABC':
+        return {'A': 5, 'B': 4, 'C': 3}[code[1]]
+    return 5 if int(code[3], 16) & 0b1000 else 4
+
+
+def synthesize(gacha_type: str,
+               total: int,
+               uid: str = '100000001',
+               lang: str = 'zh-cn',
+               start: str = '2021-01-01 00:00:00',
+               seed: int = None,
+               ) -> List[dict]:
+    """生成某一祈愿卡池的一段虚构的原始抽卡记录（从旧到新）。
+
+    星级按照大致的概率和保底生成，十连的抽卡时间相同，抽卡记录ID随时间递增。
+
+    :param gacha_type: 祈愿卡池类型。
+    :param total: 抽卡记录数量。
+    :param uid: 玩家的游戏账号号码。
+    :param lang: 抽卡记录的语言文字，决定物品名称和类型的写法。
+    :param start: 第一条记录的抽卡时间。
+    :param seed: 随机数种子。相同的种子生成相同的记录。
+    """
+    rnd = Random(seed)
+    items = res.ITEMS
+    pools = {3: [], 4: [], 5: []}
+    for code in items:
+        if lang in items[code]:
+            pools[_item_rank(code)].append(code)
+    ceiling = 80 if gacha_type == '302' else 90
+    moment = datetime.strptime(start, '%Y-%m-%d %H:%M:%S')
+    rid = 1609430400000000000 + int(gacha_type) * 1000000
+    pity4 = pity5 = 0
+    result = []
+    while len(result) < total:
+        moment += timedelta(seconds=rnd.randint(60, 86400))
+        time = moment.strftime('%Y-%m-%d %H:%M:%S')
+        for _ in range(min(10 if rnd.random() < 0.7 else 1, total - len(result))):
+            pity4 += 1
+            pity5 += 1
+            if pity5 >= ceiling or rnd.random() < 0.006:
+                rank, pity5 = 5, 0
+            elif pity4 >= 10 or rnd.random() < 0.051:
+                rank, pity4 = 4, 0
+            else:
+                rank = 3
+            code = rnd.choice(pools[rank])
+            rid += rnd.randint(1, 99)
+            result.append({
+                'uid': uid,
+                'gacha_type': gacha_type,
+                'item_id': '',
+                'count': '1',
+                'time': time,
+                'name': items[code][lang],
+                'lang': lang,
+                'item_type': ITEM_TYPES.get(lang, ITEM_TYPES['zh-cn'])[1 if code[1] in 'ABC' else 0],
+                'rank_type': str(rank),
+                'id': str(rid),
+            })
+    return result
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 保持连接，与真实接口一致。
+    disable_nagle_algorithm = True  # 避免响应头和响应体分开发送时触发延迟确认。
+
+    def do_GET(self) -> None:
+        replay = self.server.replay
+        status, content = replay.respond(self.path)
+        body = b'' if content is None else dumps(content, ensure_ascii=False).encode('UTF-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class ReplayServer:
+    RETCODE_AUTHKEY_ERROR = -100
+    """authkey 不正确时返回的 retcode 。"""
+
+    RETCODE_VISIT_TOO_FREQUENTLY = -110
+    """模拟访问过于频繁时返回的 retcode 。"""
+
+    def __init__(self,
+                 records: Dict[str, List[dict]] = None,
+                 uid: str = '100000001',
+                 lang: str = 'zh-cn',
+                 region: str = 'cn_gf01',
+                 latency: float = 0,
+                 error_rate: float = 0,
+                 limit_rate: float = 0,
+                 seed: int = None,
+                 host: str = '127.0.0.1',
+                 port: int = 0,
+                 ) -> None:
+        """抽卡记录接口（getGachaLog、getConfigList）的本地替身服务器。
+
+        按照真实接口的 ``end_id`` 游标语义分页返回抽卡记录，
+        并可以模拟网络延迟、服务端错误和访问过于频繁，
+        以便在离线环境下测试 ``GachaPlayer`` 的获取流程并测量吞吐量。
+
+        用法::
+
+            with ReplayServer.synthesize({'200': 1500, '301': 800}) as server:
+                player = server.connect(GachaPlayer())
+                player.collect()
+
+        :param records: ``{gacha_type: [原始抽卡记录, ...]}`` 形式的字典，记录顺序不限。
+        :param uid: 玩家的游戏账号号码。
+        :param lang: 抽卡记录的语言文字。
+        :param region: 游戏地区的缩写。
+        :param latency: 每个请求的额外延迟（秒）。
+        :param error_rate: 请求返回HTTP 500的概率。
+        :param limit_rate: 请求返回“访问过于频繁”的概率。
+        :param seed: 随机数种子，决定错误出现在哪些请求上。
+        :param host: 监听的地址。
+        :param port: 监听的端口。为0时由系统自动分配。
+        """
+        self.uid = uid
+        """玩家的游戏账号号码。"""
+
+        self.lang = lang
+        """抽卡记录的语言文字。"""
+
+        self.region = region
+        """游戏地区的缩写。"""
+
+        self.latency = latency
+        """每个请求的额外延迟（秒）。"""
+
+        self.error_rate = error_rate
+        """请求返回HTTP 500的概率。"""
+
+        self.limit_rate = limit_rate
+        """请求返回“访问过于频繁”的概率。"""
+
+        self.authkey = 'replay-%s' % uid
+        """服务器接受的 authkey 。"""
+
+        self.requests = 0
+        """已经处理的请求数量。"""
+
+        self._random = Random(seed)
+        self._lock = Lock()
+        self._address = (host, port)
+        self._server = None
+        self._thread = None
+
+        # 按ID从大到小（从新到旧）排列，与真实接口的顺序一致：
+        self._records = dict()
+        self._ids = dict()
+        for gacha_type in _WISH_NAMES:
+            page = sorted((records or dict()).get(gacha_type, []), key=lambda e: int(e['id']), reverse=True)
+            self._records[gacha_type] = page
+            self._ids[gacha_type] = [-int(e['id']) for e in page]
+
+    def __repr__(self) -> str:
+        return '<%s %s 抽卡记录：%i，已处理请求：%i>' % (
+            self.__class__.__name__,
+            self.api_url if self._server is not None else '(未启动)',
+            sum(len(page) for page in self._records.values()),
+            self.requests,
+        )
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.stop()
+
+    @classmethod
+    def synthesize(cls,
+                   totals: Union[Dict[str, int], int],
+                   uid: str = '100000001',
+                   lang: str = 'zh-cn',
+                   seed: int = None,
+                   **kwargs):
+        """用虚构的抽卡记录构造替身服务器。
+
+        :param totals: ``{gacha_type: 抽卡记录数量}`` 形式的字典，或者所有卡池共同的数量。
+        :param uid: 玩家的游戏账号号码。
+        :param lang: 抽卡记录的语言文字。
+        :param seed: 随机数种子。
+        :param kwargs: 其余参数与构造函数相同。
+        """
+        if type(totals) is int:
+            totals = dict.fromkeys(_WISH_NAMES, totals)
+        records = {
+            gacha_type: synthesize(gacha_type, totals[gacha_type], uid, lang, seed=seed)
+            for gacha_type in totals
+        }
+        return cls(records, uid=uid, lang=lang, seed=seed, **kwargs)
+
+    @classmethod
+    def from_archive(cls, file: str, **kwargs):
+        """用 ``GachaPlayer.dump`` 保存的抽卡记录文件构造替身服务器，回放其中的记录。
+
+        :param file: 抽卡记录文件的地址。
+        :param kwargs: 其余参数与构造函数相同。
+        """
+        player = GachaPlayer(file=file)
+        uid = player.uid if player.uid != '' else kwargs.pop('uid', '100000001')
+        lang = player.language if player.language != '' else kwargs.pop('lang', 'zh-cn')
+        region = player.region if player.region != '' else kwargs.pop('region', 'cn_gf01')
+        records = dict()
+        for wish in player.wishes:
+            records[wish.wish_type] = [{
+                'uid': uid,
+                'gacha_type': wish.wish_type,
+                'item_id': '',
+                'count': '1',
+                'time': record['time'],
+                'name': record['name'],
+                'lang': lang,
+                'item_type': record['item_type'],
+                'rank_type': record['rank_type'],
+                'id': str(record['id']),
+            } for record in wish.records]
+        return cls(records, uid=uid, lang=lang, region=region, **kwargs)
+
+    @property
+    def api_url(self) -> str:
+        """替身接口的地址，可以直接传给 ``GachaPlayer`` 的 ``api_url`` 参数。"""
+        host, port = self._server.server_address[:2]
+        return 'http://%s:%i/event/gacha_info/api/' % (host, port)
+
+    @property
+    def url(self) -> str:
+        """带有 authkey 等参数的祈愿历史记录URL，可以直接传给 ``GachaPlayer.init()`` 。"""
+        return 'https://webstatic.mihoyo.com/hk4e/event/e20190909gacha/index.html?' + urlencode({
+            'authkey_ver': '1',
+            'sign_type': '2',
+            'auth_appid': 'webview_gacha',
+            'init_type': '301',
+            'lang': self.lang,
+            'region': self.region,
+            'authkey': self.authkey,
+            'game_biz': 'hk4e_cn' if self.region.startswith('cn') else 'hk4e_global',
+        })
+
+    def start(self) -> None:
+        """在后台线程中启动服务器。"""
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer(self._address, _ReplayHandler)
+        self._server.daemon_threads = True
+        self._server.replay = self
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """关闭服务器。"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self._thread = None
+
+    def connect(self, player: GachaPlayer) -> GachaPlayer:
+        """将 ``player`` 指向本服务器并完成初始化。
+
+        :param player: 需要指向本服务器的对象。
+        :return: 就是 ``player`` 本身。
+        """
+        player.api_url = self.api_url
+        player.init(url=self.url)
+        return player
+
+    def respond(self, path: str) -> tuple:
+        """根据请求路径生成响应。
+
+        :return: HTTP状态码和JSON对象。JSON对象为 ``None`` 时表示响应体为空。
+        """
+        with self._lock:
+            self.requests += 1
+            dice = self._random.random()
+        if self.latency > 0:
+            sleep(self.latency)
+        if dice < self.error_rate:
+            return 500, None
+        if dice < self.error_rate + self.limit_rate:
+            return 200, self._failure(self.RETCODE_VISIT_TOO_FREQUENTLY, 'visit too frequently')
+
+        parts = urlparse(path)
+        params = dict(parse_qsl(parts.query))
+        if params.get('authkey') != self.authkey:
+            return 200, self._failure(self.RETCODE_AUTHKEY_ERROR, 'authkey error')
+        if parts.path.endswith('/getConfigList'):
+            return 200, self._success({
+                'gacha_type_list': [
+                    {'id': _WISH_IDS[k], 'key': k, 'name': _WISH_NAMES[k]} for k in ('200', '100', '301', '302')
+                ],
+                'region': self.region,
+            })
+        if parts.path.endswith('/getGachaLog'):
+            return 200, self._success(self._page(params))
+        return 404, None
+
+    def _page(self, params: dict) -> dict:
+        """按照 ``end_id`` 游标截取一页抽卡记录。"""
+        gacha_type = params.get('gacha_type', '301')
+        size = min(int(params.get('size', '6')), GachaPlayer._PAGE_SIZE_MAX)
+        end_id = int(params.get('end_id', '0'))
+        records = self._records.get(gacha_type, [])
+        start = 0 if end_id == 0 else bisect_left(self._ids[gacha_type], -end_id + 1)
+        return {
+            'page': params.get('page', '1'),
+            'size': str(size),
+            'total': '0',
+            'list': records[start:start + size],
+            'region': self.region,
+        }
+
+    @staticmethod
+    def _success(data: dict) -> dict:
+        return {'retcode': 0, 'message': 'OK', 'data': data}
+
+    @staticmethod
+    def _failure(retcode: int, message: str) -> dict:
+        return {'retcode': retcode, 'message': message, 'data': None}
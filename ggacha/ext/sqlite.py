@@ -0,0 +1,190 @@
+import sqlite3
+from typing import List, Union
+
+from ggacha import GachaPlayer, GachaWish
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS players (
+    uid TEXT PRIMARY KEY,
+    version TEXT NOT NULL DEFAULT '',
+    "create" TEXT NOT NULL DEFAULT '',
+    modify TEXT NOT NULL DEFAULT '',
+    lang TEXT NOT NULL DEFAULT '',
+    region TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS wishes (
+    uid TEXT NOT NULL,
+    gacha_type TEXT NOT NULL,
+    wish_name TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (uid, gacha_type)
+);
+CREATE TABLE IF NOT EXISTS records (
+    uid TEXT NOT NULL,
+    gacha_type TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    time TEXT NOT NULL,
+    name TEXT NOT NULL,
+    item_type TEXT NOT NULL,
+    rank_type TEXT NOT NULL,
+    PRIMARY KEY (uid, gacha_type, id, time)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS records_by_time ON records (uid, gacha_type, time, id);
+'''
+
+
+class SqliteStorage:
+    def __init__(self, file: str) -> None:
+        """基于SQLite的抽卡记录存储后端。
+
+        可以在同一个数据库中存放任意多个玩家的抽卡记录，
+        按 (uid, gacha_type, time, id) 建立索引，查询某个卡池、某段时间的记录时不必载入全部数据。
+        保存即合并：重复的记录（ID和抽卡时间都相同）只保留最先保存的那一条，与 ``+=`` 一致。
+
+        :param file: 数据库文件的地址。也可以是 ``':memory:'`` 。
+        """
+        self.file = file
+        """数据库文件的地址。"""
+
+        self._db = sqlite3.connect(file, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+
+    def __repr__(self) -> str:
+        return '<%s %s>' % (self.__class__.__name__, self.file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """关闭数据库连接。"""
+        self._db.close()
+
+    def uids(self) -> List[str]:
+        """获取数据库中所有玩家的UID。"""
+        return [row[0] for row in self._db.execute('SELECT uid FROM players ORDER BY uid')]
+
+    def save(self, player: GachaPlayer) -> None:
+        """将一个玩家的抽卡记录合并保存到数据库中。
+
+        地区、语言文字按照 ``player`` 的TNF策略与已保存的信息合并；
+        抽卡记录批量插入，已经存在的记录会被忽略。
+
+        :param player: 需要保存的玩家数据。UID不能为空。
+        """
+        if player.uid == '':
+            raise ValueError('没有UID的抽卡记录无法保存到数据库中。')
+        master = self.load(player.uid, records=False)
+        if master is None:
+            master = GachaPlayer()
+            master.uid = player.uid
+            master.language = player.language
+            master.region = player.region
+        master.multi_region = player.multi_region
+        master.multi_language = player.multi_language
+        master._merge_infos(player)  # 不同UID的数据不会合并到同一个玩家下，因此只检查地区和语言。
+        master.create = min(filter(None, [master.create, player.create]), default='')
+        master.modify = max(master.create, master.modify, player.create, player.modify)
+
+        with self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO players (uid, version, "create", modify, lang, region) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (player.uid, GachaPlayer.VERSION, master.create, master.modify, master.language, master.region),
+            )
+            for wish in player.wishes:
+                if wish.wish_name != '':
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO wishes (uid, gacha_type, wish_name) VALUES (?, ?, ?)',
+                        (player.uid, wish.wish_type, wish.wish_name),
+                    )
+                self._db.executemany(
+                    'INSERT OR IGNORE INTO records (uid, gacha_type, id, time, name, item_type, rank_type) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    ((player.uid, wish.wish_type, int(r['id']), r['time'], r['name'], r['item_type'], r['rank_type'])
+                     for r in wish.records),
+                )
+
+    def load(self, uid: str, records: bool = True) -> Union[GachaPlayer, None]:
+        """从数据库中载入一个玩家的数据。
+
+        :param uid: 玩家的UID。
+        :param records: 是否同时载入抽卡记录。为 ``False`` 时只载入创建修改时间、地区、语言文字等信息。
+        :return: 玩家数据。数据库中没有这个玩家时返回 ``None`` 。
+        """
+        row = self._db.execute(
+            'SELECT "create", modify, lang, region FROM players WHERE uid = ?', (uid,)
+        ).fetchone()
+        if row is None:
+            return None
+        player = GachaPlayer()
+        player.uid = uid
+        player.create, player.modify, player.language, player.region = row
+        player._sync_infos()
+        names = dict(self._db.execute('SELECT gacha_type, wish_name FROM wishes WHERE uid = ?', (uid,)))
+        for i in range(len(player.wishes)):
+            player.wishes[i].wish_name = names.get(player.wishes[i].wish_type, '')
+            if records:
+                player.wishes[i].records = self.query(uid, player.wishes[i].wish_type)
+        return player
+
+    def query(self,
+              uid: str,
+              gacha_type: str = None,
+              rank: Union[str, int] = None,
+              name: str = None,
+              since: str = None,
+              until: str = None,
+              ) -> List[dict]:
+        """按条件查询抽卡记录，结果按抽卡时间（其次按ID）排序。
+
+        :param uid: 玩家的UID。
+        :param gacha_type: 可选。祈愿卡池类型。
+        :param rank: 可选。星级。
+        :param name: 可选。角色或武器的名称。
+        :param since: 可选。最早的抽卡时间（包括），格式为 “YYYY-mm-dd HH:MM:SS” 或其前缀。
+        :param until: 可选。最晚的抽卡时间（不包括），格式同上。
+        :return: 与 ``GachaWish.records`` 结构相同的抽卡记录列表。
+        """
+        conditions = ['uid = ?']
+        params = [uid]
+        for column, operator, value in (
+                ('gacha_type', '=', gacha_type),
+                ('rank_type', '=', None if rank is None else str(rank)),
+                ('name', '=', name),
+                ('time', '>=', since),
+                ('time', '<', until),
+        ):
+            if value is not None:
+                conditions.append('%s %s ?' % (column, operator))
+                params.append(value)
+        cursor = self._db.execute(
+            'SELECT time, name, item_type, rank_type, id FROM records WHERE %s ORDER BY time, id'
+            % ' AND '.join(conditions),
+            params,
+        )
+        return [
+            {'time': time, 'name': name, 'item_type': item_type, 'rank_type': rank_type, 'id': rid}
+            for time, name, item_type, rank_type, rid in cursor
+        ]
+
+    def query_wish(self, uid: str, gacha_type: str, **kwargs) -> GachaWish:
+        """按条件查询某一祈愿卡池的抽卡记录，并包装为 ``GachaWish`` 。
+
+        :param uid: 玩家的UID。
+        :param gacha_type: 祈愿卡池类型。
+        :param kwargs: 其余筛选条件，与 ``query()`` 相同。
+        """
+        wish = GachaWish(gacha_type=gacha_type)
+        wish.uid = uid
+        row = self._db.execute(
+            'SELECT wish_name FROM wishes WHERE uid = ? AND gacha_type = ?', (uid, gacha_type)
+        ).fetchone()
+        wish.wish_name = row[0] if row is not None else ''
+        row = self._db.execute('SELECT lang, region FROM players WHERE uid = ?', (uid,)).fetchone()
+        wish.language, wish.region = row if row is not None else ('', '')
+        wish.records = self.query(uid, gacha_type, **kwargs)
+        return wish
@@ -1,3 +1,5 @@
+from collections.abc import Mapping
+
 from xlsxwriter import Workbook
 
 from ggacha import GachaPlayer
@@ -45,21 +47,18 @@ def save_as_xlsx(obj: GachaPlayer, file: str):
         if type(wish.records) is not list:
             continue
         row = 0
-        counter = 0
         sheet = book.add_worksheet(wish.wish_name if wish.wish_name != '' else wish.wish_type)
         sheet.write_row(row, 0, cell_format=style_head, data=titles)
         wish.sort()
-        for record in wish.records:
-            if type(record) is not dict:
+        for record, pity in zip(wish.records, wish.pity()):
+            if not isinstance(record, Mapping):
                 continue
             row += 1
-            counter += 1
             data = [record['time'], record['name'],
                     record['item_type'], int(record['rank_type']),
-                    row, counter]
+                    row, pity.pity5]
             sheet.write_row(row, 0, data, style_rank3)
             if record['rank_type'] == '5':
-                counter = 0
                 sheet.write_row(row, 0, data, style_rank5)
             elif record['rank_type'] == '4':
                 sheet.write_row(row, 0, data, style_rank4)
@@ -0,0 +1,139 @@
+from typing import List, NamedTuple, Union
+
+from ggacha.common.time import parse_time, region_offset
+from ggacha.res.index import HistoryIndex, history_index
+
+
+class PullPity(NamedTuple):
+    """单条抽卡记录的保底信息。"""
+
+    pity5: int
+    """这一抽是五星保底内的第几抽。抽出五星之后，下一抽重新从1开始计数。"""
+
+    pity4: int
+    """这一抽是四星保底内的第几抽。抽出四星或五星之后，下一抽重新从1开始计数。"""
+
+    up: Union[bool, None]
+    """抽出的四星或五星是否为当期UP。三星、没有UP的卡池、或者找不到对应的卡池历史时为 ``None`` 。"""
+
+    guaranteed: bool
+    """抽出这个四星或五星时是否处于“大保底”，即上一个同星级的物品不是UP。"""
+
+
+class PityState(NamedTuple):
+    """祈愿卡池当前的保底状态，即下一抽之前的状态。"""
+
+    pity5: int
+    """距离上一个五星已经抽了多少次。"""
+
+    pity4: int
+    """距离上一个四星或五星已经抽了多少次。"""
+
+    guaranteed5: bool
+    """下一个五星是否必定为UP。"""
+
+    guaranteed4: bool
+    """下一个四星是否必定为UP。"""
+
+
+class PityEngine:
+    def __init__(self, wish) -> None:
+        """祈愿卡池的保底计算器。
+
+        按抽卡时间的先后一次遍历算出每一条记录的四星、五星保底抽数以及UP与否、大保底与否，
+        结果和遍历结束时的状态都会被缓存。之后如果抽卡记录只是在末尾增加了更晚的记录
+        （比如增量同步后合并），就从缓存的状态继续计算新增的部分，而不必重新遍历全部记录；
+        否则重新计算。
+
+        :param wish: 祈愿卡池（``GachaWish``）。
+        """
+        self.wish = wish
+        """对应的祈愿卡池。"""
+
+        self.reset()
+
+    def __repr__(self) -> str:
+        return '<%s(%s) %s>' % (self.__class__.__name__, self.wish.wish_type, self.state())
+
+    def reset(self) -> None:
+        """清除缓存。下次查询时重新计算全部记录。"""
+        self._records = None
+        self._index = None
+        self._length = 0
+        self._last = None
+        self._last_key = None
+        self._results = []
+        self._state = PityState(0, 0, False, False)
+
+    def _is_up(self, index: HistoryIndex, name: str, time: str) -> Union[bool, None]:
+        """判断某个物品在某个时间是否为当期UP。找不到对应的卡池历史时返回 ``None`` 。"""
+        events = index.at(parse_time(time, region_offset(self.wish.region)))
+        if len(events) == 0:
+            return None
+        return any(name in event['items']['up'] for event in events)
+
+    def _sync(self) -> None:
+        records = self.wish.records
+        index = history_index(self.wish.wish_type)  # 静态资源被重新载入后是新的索引，需要重新计算。
+        if not (records is self._records
+                and index is self._index
+                and len(records) >= self._length
+                and (self._length == 0 or records[self._length - 1] is self._last)):
+            self.reset()
+        start = self._length
+        if start == len(records):
+            return
+
+        def key(i):
+            return records[i]['time'], records[i]['id']
+
+        order = sorted(range(start, len(records)), key=key)
+        if self._last_key is not None and key(order[0]) <= self._last_key:
+            # 新增的记录早于已经计算过的记录，只能重新计算：
+            self.reset()
+            start = 0
+            order = sorted(range(len(records)), key=key)
+
+        featured = len(index) != 0
+        pity5, pity4, guaranteed5, guaranteed4 = self._state
+        results = [None] * (len(records) - start)
+        for i in order:
+            record = records[i]
+            pity5 += 1
+            pity4 += 1
+            rank = record['rank_type']
+            if rank == '5' or rank == '4':
+                up = self._is_up(index, record['name'], record['time']) if featured else None
+                guaranteed = guaranteed5 if rank == '5' else guaranteed4
+                results[i - start] = PullPity(pity5, pity4, up, guaranteed)
+                if up is not None:
+                    if rank == '5':
+                        guaranteed5 = not up
+                    else:
+                        guaranteed4 = not up
+                if rank == '5':
+                    pity5 = 0
+                pity4 = 0
+            else:
+                results[i - start] = PullPity(pity5, pity4, None, False)
+
+        self._results.extend(results)
+        self._state = PityState(pity5, pity4, guaranteed5, guaranteed4)
+        self._records = records
+        self._index = index
+        self._length = len(records)
+        self._last = records[-1]
+        self._last_key = key(order[-1])
+
+    def pities(self) -> List[PullPity]:
+        """获取每一条抽卡记录的保底信息。
+
+        :return: 与 ``records`` 一一对应的保底信息。
+        """
+        self._sync()
+        return list(self._results)
+
+    def state(self) -> PityState:
+        """获取当前的保底状态。"""
+        self._sync()
+        return self._state
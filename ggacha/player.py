@@ -1,18 +1,41 @@
+from collections.abc import Mapping
+from functools import partial
 from datetime import datetime, timedelta
-from json import loads, load, dumps
+from itertools import islice
+from mmap import mmap, ACCESS_READ
+from os import SEEK_END, fstat, remove, replace
+from os.path import getsize, isfile, splitext
+from json import JSONEncoder, loads, load, dumps
 from json.decoder import JSONDecodeError
 from random import random
+from threading import RLock
 from time import sleep
-from typing import Callable, Union
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Union
 from urllib.parse import urlparse, urlencode, parse_qsl
 
-from requests import get
-
 from ggacha import GachaWish
-from ggacha.throwable import CollectingError, MultiRegionError, MultiLanguageError, MultiUIDError
+from ggacha.record import GachaRecord, parse_ids
+from ggacha.checkpoint import Checkpoint, WishProgress
+from ggacha.common.compress import is_compressed, open_text
+from ggacha.common.limiter import TokenBucket
+from ggacha.transport import GachaTransport
+from ggacha.throwable import GenshinBaseException, CollectingError, MultiRegionError, MultiLanguageError, MultiUIDError
+
+
+_ENCODER = JSONEncoder(ensure_ascii=False)
+"""逐条序列化抽卡记录时共用的编码器，避免每条记录都新建一个。"""
+
+
+def _jsonable(record: Mapping) -> dict:
+    """抽卡记录在文件中的形式。ID在内部是整数，在文件中则与接口一致，是字符串。"""
+    record = record.to_dict() if type(record) is GachaRecord else dict(record)
+    record['id'] = str(record['id'])
+    return record
 
 
 def http_get_json(url: str, encoding: str = 'UTF-8'):
+    from requests import get  # requests 导入较慢，只在需要时导入。
+
     return loads(get(url).content.decode(encoding))
 
 
@@ -23,12 +46,21 @@ class GachaPlayer:
     _UTCTIME_F = '%Y-%m-%d %H:%M:%S UTC+0'
     """collector 属性的时间字符串格式。"""
 
+    _DUMP_CHUNK = 512
+    """保存抽卡记录时每次写入文件的记录数量。"""
+
     VERSION = '2.0'
     """本类适配的最新游戏版本。"""
 
     SUPPORT_VERSIONS = ['1.4', '1.5', '1.6', VERSION]
     """兼容的游戏版本。意思是可以对这些版本的数据进行合并操作。"""
 
+    API_URL = 'https://hk4e-api.mihoyo.com/event/gacha_info/api/'
+    """抽卡记录接口的默认地址。"""
+
+    API_URL_OS = 'https://hk4e-api-os.mihoyo.com/event/gacha_info/api/'
+    """国际服（地区以 ``os_`` 开头）抽卡记录接口的地址。"""
+
     PROCESS_READ_LOG = 0x0011
     PROCESS_PARSE_LOG = 0x0012
     PROCESS_TEST_PASSKEY = 0x0013
@@ -44,6 +76,10 @@ class GachaPlayer:
                  allow_multi_region: Union[bool, None] = False,
                  allow_multi_language: Union[bool, None] = False,
                  allow_multi_uid: Union[bool, None] = False,
+                 limiter: TokenBucket = None,
+                 transport: GachaTransport = None,
+                 api_url: str = API_URL,
+                 lazy: bool = False,
                  ) -> None:
         """
         原神祈愿抽取记录数据类。
@@ -65,6 +101,11 @@ class GachaPlayer:
                                      空字符串也视为一种语言文字。遵循“TNF策略”。
         :param allow_multi_uid: 是否允许合并不同玩家（UID）的数据。
                                 空字符串也视为一个UID。遵循“TNF策略”。
+        :param limiter: 可选。获取抽卡记录时共用的限流器。
+                        不提供时每获取一页记录就随机暂停0~2秒。
+        :param transport: 可选。发出HTTP请求的传输层。不提供时使用默认配置的 ``GachaTransport`` 。
+        :param api_url: 可选。抽卡记录接口的地址，以 ``/`` 结尾。比如可以指向本地的替身服务器。
+        :param lazy: 提供了 ``file`` 时，是否延迟载入抽卡记录。详见 ``load()`` 。
         """
 
         self.region = ''
@@ -116,7 +157,7 @@ class GachaPlayer:
         """所有祈愿卡池。"""
 
         if file != '':  # 使用文件直接新建本类。
-            self.load(file)
+            self.load(file, lazy=lazy)
 
         self.handler = handler if callable(handler) else None
         """获取抽卡记录的回调函数。
@@ -124,6 +165,27 @@ class GachaPlayer:
         当获取抽卡记录时会自动调用本函数，以向外界传递操作进度。
         """
 
+        self.limiter = limiter
+        """获取抽卡记录时使用的限流器。
+        
+        每次请求抽卡记录前都会从中取走一个令牌；为 ``None`` 时则在每页之后随机暂停0~2秒。
+        """
+
+        self.transport = transport if transport is not None else GachaTransport()
+        """发出HTTP请求的传输层。
+        
+        可以是任何提供了 ``get_json(url)`` 方法的对象。
+        """
+
+        self.api_url = api_url
+        """抽卡记录接口的地址，以 ``/`` 结尾。
+        
+        为默认值时会根据游戏地区自动选用国服或国际服的接口。
+        """
+
+        # 并发获取时，保证回调函数不会被多个线程同时调用：
+        self._handler_lock = RLock()
+
         # 从日志里获取到的URL的GET请求参数：
         self._url_part = str()
         self._url_params = dict()
@@ -150,6 +212,15 @@ class GachaPlayer:
                     self.__class__.__name__, type(other).__name__,
                 )
             )
+        self._merge_infos(other)
+        for i in range(len(self.wishes)):
+            self.wishes[i] += other.wishes[i]
+
+        self.modify = max(self.create, self.modify, other.create, other.modify)
+        return self
+
+    def _merge_infos(self, other: 'GachaPlayer') -> None:
+        """按照TNF策略合并地区、语言文字和UID。"""
         if self.region != other.region:
             if self.multi_region is True:
                 self.region = other.region
@@ -165,16 +236,45 @@ class GachaPlayer:
                 self.uid = other.uid
             elif self.multi_uid is False:
                 raise MultiUIDError(self.uid, other.uid)
+        self._sync_infos()
 
-        for i in range(len(self.wishes)):
-            self.wishes[i] += other.wishes[i]
+    def _sync_infos(self) -> None:
+        """将游戏地区、语言文字及其TNF策略同步到各祈愿卡池。
 
-        self.modify = max(self.create, self.modify, other.create, other.modify)
-        return self
+        祈愿卡池按照自己的游戏地区解读抽卡时间（见 ``GachaWish.t2stamp()`` ），
+        合并时也会按照自己的TNF策略检查地区和语言文字，因此设置 ``region`` 、 ``language`` 之后需要调用。
+        """
+        for wish in self.wishes:
+            wish.region = self.region
+            wish.multi_region = self.multi_region
+            wish.language = self.language
+            wish.multi_language = self.multi_language
+
+    def merge_many(self, files: Iterable[str], workers: int = 4) -> None:
+        """一次性将多个抽卡记录文件合并到当前对象中。
+
+        效果与依次载入每个文件再用 ``+=`` 合并相同，但文件在线程池中并行载入，
+        TNF策略只对所有文件的信息检查一遍，每个祈愿卡池的所有记录也只去重、排序一次，
+        而不是每合并一个文件就重新整理一遍越来越大的记录。
+
+        :param files: 抽卡记录文件的地址。比如 ``main.py`` 保存的所有 ``raw_{uid}_{time}.json`` 。
+        :param workers: 同时载入的文件数量。
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        files = list(files)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            others = list(pool.map(lambda file: GachaPlayer(file=file), files))
+        for other in others:
+            self._merge_infos(other)
+        for i in range(len(self.wishes)):
+            self.wishes[i].merge_many([other.wishes[i] for other in others])
+        self.modify = max([self.create, self.modify] + [t for other in others for t in (other.create, other.modify)])
 
     def _call_handler(self, code: int, message: str, **kwargs) -> None:
         if callable(self.handler):
-            self.handler(code, message, **kwargs)
+            with self._handler_lock:
+                self.handler(code, message, **kwargs)
         else:
             pass
 
@@ -182,16 +282,20 @@ class GachaPlayer:
         """获取所有祈愿卡池 gacha_type 与 wish_name 的对照表。"""
         return {str(wish.wish_type): wish.wish_name for wish in self.wishes}
 
-    def init(self, log_path: str = '') -> None:
-        """进行初始化以准备获取数据。如有需要，可以再次调用以重新初始化。
+    @property
+    def api(self) -> str:
+        """实际请求的抽卡记录接口地址。"""
+        if self.api_url == self.API_URL and self.region.startswith('os_'):
+            return self.API_URL_OS
+        return self.api_url
 
-        :param log_path: 原神日志文件的地址。若不提供或提供的文件地址并不存在，则自动寻找日志。
-        """
+    def _read_log_url(self, log_path: str) -> str:
+        """从原神日志中读取最近一次打开的祈愿历史记录URL。"""
 
         # ################################
         # 查找本地output_log.txt：
         from os import environ as env
-        from os.path import isfile, join as join_
+        from os.path import join as join_
 
         if isfile(log_path):
             path_log = log_path
@@ -219,10 +323,23 @@ class GachaPlayer:
                     break
         if len(url) == 0:
             raise CollectingError('没有找到URL，请尝试在原神中浏览一下抽卡记录。')
+        return url
+
+    def init(self, log_path: str = '', url: str = '') -> None:
+        """进行初始化以准备获取数据。如有需要，可以再次调用以重新初始化。
+
+        :param log_path: 原神日志文件的地址。若不提供或提供的文件地址并不存在，则自动寻找日志。
+        :param url: 可选。直接提供带有 authkey 等参数的祈愿历史记录URL，此时不再读取日志。
+        """
+        if url == '':
+            url = self._read_log_url(log_path)
+        else:
+            self._call_handler(self.PROCESS_PARSE_LOG, '正在解析URL')
         self._url_part = urlparse(url).query
         self._url_params = dict(parse_qsl(self._url_part))
         self.language = self._url_params['lang']
         self.region = self._url_params['region']
+        self._sync_infos()
         # 这里有个坑：
         # qs返回{key: [value]}类型，qsl返回[(key, value)]类型，
         # 而前者的返回值在经过urlencode()后会跟原URL不一致。
@@ -230,8 +347,8 @@ class GachaPlayer:
         # ################################
         # 测试URL中的GET参数是否正确：
         self._call_handler(self.PROCESS_TEST_PASSKEY, '正在测试URL参数')
-        content = http_get_json(
-            url='https://hk4e-api.mihoyo.com/event/gacha_info/api/getGachaLog?' + self._url_part
+        content = self.transport.get_json(
+            url=self.api + 'getGachaLog?' + self._url_part
         )
         # content = {
         #     "retcode": 0,
@@ -248,12 +365,14 @@ class GachaPlayer:
             raise CollectingError('请求数据失败：(%s) %s' % (
                 content['retcode'], content['message']
             ))
+        if content['data'] is not None and content['data'].get('list'):
+            self.uid = content['data']['list'][0]['uid']  # 顺便得知UID，方便事先找到存档。
 
         # ################################
         # 获取当前卡池类型：
         self._call_handler(self.PROCESS_GET_WISHES_TYPE, '正在获取卡池类型')
-        content = http_get_json(
-            url='https://hk4e-api.mihoyo.com/event/gacha_info/api/getConfigList?' + self._url_part
+        content = self.transport.get_json(
+            url=self.api + 'getConfigList?' + self._url_part
         )
         # content == {
         #     'retcode': 0,
@@ -287,7 +406,7 @@ class GachaPlayer:
                            end_id: str
                            ) -> str:
         """构造查询抽卡记录的GET请求的地址。"""
-        url = 'https://hk4e-api.mihoyo.com/event/gacha_info/api/getGachaLog?'
+        url = self.api + 'getGachaLog?'
         params = dict(**self._url_params)  # 避免直接修改日志文件里的URL的参数
         params['size'] = str(size)
         params['gacha_type'] = wish_type
@@ -295,16 +414,25 @@ class GachaPlayer:
         params['end_id'] = end_id
         return url + urlencode(params)
 
-    def collect_one(self, wish_type: str) -> list:
-        """获取某一祈愿卡池的所有抽卡记录。
+    def _iter_pages(self,
+                    wish_type: str,
+                    since_id: str = '',
+                    page: int = 1,
+                    end_id: str = '0',
+                    ) -> Iterator[Tuple[int, str, list]]:
+        """逐页获取某一祈愿卡池的抽卡记录（从新到旧）。
 
         :param wish_type: 祈愿卡池类型。
+        :param since_id: 可选。已存档的最新一条抽卡记录的ID。遇到这条记录时停止翻页。
+        :param page: 从第几页开始获取。
+        :param end_id: 上一页最后一条记录的ID，即翻页游标。从第一页开始时为 ``'0'`` 。
+        :return: 逐页产生 ``(页码, 翻页游标, 这一页的原始抽卡记录)`` 。
         """
-        page = 1
-        end_id = '0'
-        result = []
+        known = int(since_id) if since_id != '' else -1
         while True:
-            content = http_get_json(
+            if self.limiter is not None:
+                self.limiter.acquire()
+            content = self.transport.get_json(
                 url=self._build_records_api(
                     wish_type=wish_type,
                     size=self._PAGE_SIZE_MAX,
@@ -336,24 +464,179 @@ class GachaPlayer:
             #         "region": "cn_gf01"
             #     }
             # }
+            if content['data'] is None:
+                raise CollectingError('获取第 %i 页记录失败。(%s) %s' % (
+                    page, content['retcode'], content['message']
+                ))
             if content['data']['list'] is None:
                 break
             if len(content['data']['list']) == 0:
                 break
+            reached = False
+            items = []
             for item in content['data']['list']:
-                result.append(item)
+                # 抽卡记录是从新到旧返回的，遇到已存档的记录即可停止：
+                if int(item['id']) <= known:
+                    reached = True
+                    break
+                items.append(item)
             end_id = content['data']['list'][-1]['id']
             self._call_handler(
                 code=self.PROCESS_GET_RECORD_PAGE,
                 message='获取第 %i 页记录' % page,
                 page=page,
+                wish_type=wish_type,
             )
+            yield page, end_id, items
+            if reached:
+                break
             page += 1
-            sleep(random() * 2)
+            if self.limiter is None:
+                sleep(random() * 2)
+
+    @staticmethod
+    def _strip(record: dict) -> str:
+        """就地清除原始抽卡记录中无关紧要的字段、将ID转换为整数，并返回其中的uid。"""
+        uid = record.pop('uid')
+        record.pop('gacha_type')
+        record.pop('item_id')
+        record.pop('count')
+        record.pop('lang')
+        record['id'] = int(record['id'])
+        return uid
+
+    def _probe_uid(self) -> str:
+        """逐个祈愿卡池请求一条抽卡记录，以得知UID。所有卡池都没有记录时返回空字符串。"""
+        for wish in self.wishes:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            content = self.transport.get_json(url=self._build_records_api(wish.wish_type, 1, 1, '0'))
+            if content['data'] is not None and content['data'].get('list'):
+                return content['data']['list'][0]['uid']
+        return ''
+
+    def _since_ids(self, since: Union['GachaPlayer', Dict[str, str], None]) -> List[str]:
+        """将 ``since`` 参数转换为与 ``self.wishes`` 一一对应的最新记录ID列表。"""
+        if isinstance(since, GachaPlayer):
+            if self.uid == '':
+                self.uid = since.uid  # 没有新增记录时，也能正常合并回存档。
+            since = {wish.wish_type: wish.newest_id() for wish in since.wishes}
+        elif since is None:
+            since = dict()
+        return [since.get(wish.wish_type, '') for wish in self.wishes]
+
+    def collect_one(self, wish_type: str, since_id: str = '') -> list:
+        """获取某一祈愿卡池的所有抽卡记录。
+
+        :param wish_type: 祈愿卡池类型。
+        :param since_id: 可选。已存档的最新一条抽卡记录的ID。
+                         提供时只获取比它更新的记录，并在翻到这条记录所在的页时停止。
+        """
+        result = []
+        for _, _, items in self._iter_pages(wish_type, since_id):
+            result += items
         return result
 
-    def collect(self) -> None:
-        """获取所有祈愿卡池的抽卡记录。"""
+    def _collect_wish(self,
+                      index: int,
+                      since_id: str = '',
+                      checkpoint: Checkpoint = None,
+                      progress: WishProgress = None,
+                      ) -> list:
+        """获取第 ``index`` 个祈愿卡池的所有抽卡记录（从新到旧）。"""
+        wish_type = self.wishes[index].wish_type
+        self._call_handler(
+            code=self.PROCESS_GET_WISH_RECORDS,
+            message='获取【%s】的记录' % self.wishes[index].wish_name,
+            wish=self.wishes[index].wish_name,
+        )
+        if checkpoint is None:
+            return self.collect_one(wish_type, since_id)
+
+        # 从检查点日志记载的游标处继续：
+        progress = progress if progress is not None else WishProgress()
+        result = progress.records
+        if not progress.done:
+            for page, end_id, items in self._iter_pages(wish_type, since_id, progress.page + 1, progress.end_id):
+                checkpoint.append(wish_type, page, end_id, items)
+                result += items
+            checkpoint.finish(wish_type)
+        return result
+
+    def collect(self,
+                workers: int = 1,
+                since: Union['GachaPlayer', Dict[str, str], None] = None,
+                checkpoint: str = '',
+                ) -> None:
+        """获取所有祈愿卡池的抽卡记录。
+
+        :param workers: 同时获取的祈愿卡池数量。大于1时各个卡池在线程池中并行翻页，
+                        此时建议提供 ``limiter`` 以限制总的请求频率。
+                        无论是否并行，获取到的数据都是一样的。
+        :param since: 可选。已有的存档，或者 ``{gacha_type: 最新一条记录的ID}`` 形式的字典。
+                      提供时只获取存档之后新增的抽卡记录（增量同步），
+                      之后再用 ``+=`` 合并到存档中即可。
+        :param checkpoint: 可选。检查点日志文件的地址。提供时每获取一页记录就追加到日志中，
+                           意外中断后以相同的参数再次调用，将从日志记载的游标处继续获取。
+                           全部获取完毕后记录会转存到当前对象中，日志随即删除。
+                           日志属于其他账号（UID不同），或者增量同步的起点不同时，日志作废，重新获取。
+        """
+        if checkpoint != '' and self.uid == '':
+            self.uid = self._probe_uid()  # 确认UID之后才能判断日志是否属于当前账号。
+        since_ids = self._since_ids(since)
+
+        journal, progresses = None, dict()
+        if checkpoint != '':
+            journal = Checkpoint(
+                checkpoint,
+                self.language,
+                self.region,
+                self.uid,
+                {self.wishes[i].wish_type: since_ids[i] for i in range(len(self.wishes))},
+            )
+            progresses = journal.read()
+            journal.open()
+        args = [
+            (i, since_ids[i], journal, progresses.get(self.wishes[i].wish_type))
+            for i in range(len(self.wishes))
+        ]
+
+        self.modify = datetime.utcnow().strftime(self._UTCTIME_F)
+        self.create = self.modify if self.create == '' else self.create
+        if workers > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=min(workers, len(self.wishes))) as pool:
+                futures = [pool.submit(self._collect_wish, *arg) for arg in args]
+                pages = [future.result() for future in futures]
+        else:
+            pages = [self._collect_wish(*arg) for arg in args]
+        for i in range(len(self.wishes)):
+            # 清除无关紧要的字段：（因为原始数据是从新到旧的，所以直接逆序遍历）
+            page = pages[i][::-1]
+            for j in range(len(page)):
+                self.uid = self._strip(page[j])
+            self.wishes[i].records = page
+        if journal is not None:
+            journal.remove()
+        self._call_handler(self.PROCESS_END_DOWNLOAD, '记录获取完毕')
+
+    def collect_iter(self,
+                     since: Union['GachaPlayer', Dict[str, str], None] = None,
+                     ) -> Iterator[Tuple[str, List[dict]]]:
+        """逐页获取所有祈愿卡池的抽卡记录，每获取一页就立即交给调用者。
+
+        与 ``collect()`` 不同，本方法不会把记录存到当前对象中，
+        也不必等到某个卡池全部获取完毕，因此内存占用只有一页记录的大小，
+        合并、统计、导出等后续处理可以边获取边进行。
+
+        产生的记录已经清除了 uid、gacha_type、item_id、count、lang 等字段，
+        顺序与接口一致，即每个卡池内 **从新到旧** 。
+
+        :param since: 可选。含义与 ``collect()`` 的同名参数相同。
+        :return: 逐页产生 ``(祈愿卡池类型, 这一页的抽卡记录)`` 。
+        """
+        since_ids = self._since_ids(since)
         self.modify = datetime.utcnow().strftime(self._UTCTIME_F)
         self.create = self.modify if self.create == '' else self.create
         for i in range(len(self.wishes)):
@@ -362,25 +645,37 @@ class GachaPlayer:
                 message='获取【%s】的记录' % self.wishes[i].wish_name,
                 wish=self.wishes[i].wish_name,
             )
-            # 获取数据并清除无关紧要的字段：（因为原始数据是从新到旧的，所以直接逆序遍历）
-            page = self.collect_one(self.wishes[i].wish_type)[::-1]
-            for j in range(len(page)):
-                self.uid = page[j].pop('uid')
-                page[j].pop('gacha_type')
-                page[j].pop('item_id')
-                page[j].pop('count')
-                page[j].pop('lang')
-            self.wishes[i].records = page
+            for _, _, items in self._iter_pages(self.wishes[i].wish_type, since_ids[i]):
+                for item in items:
+                    self.uid = self._strip(item)
+                yield self.wishes[i].wish_type, items
         self._call_handler(self.PROCESS_END_DOWNLOAD, '记录获取完毕')
 
     def dump(self, file: str, safe: bool = False) -> None:
         """将获取到的抽卡记录保存为紧凑但兼有换行、易于浏览的JSON格式文件。
 
+        文件以 ``.gz`` 或 ``.xz`` 结尾时，会一边写入一边以 gzip 或 xz 格式压缩。
+
+        内容先写入同一文件夹中的临时文件，再替换原文件，中途失败不会损坏原有的文件。
+        因此延迟载入的存档也可以保存回它自己的文件：尚未载入的抽卡记录在写入时才从原文件中读取。
+
         :param file: 具体的文件地址。
         :param safe: 是否去除敏感信息，包括uid、language、region和抽卡记录ID。
         """
+        temp = '%s.tmp%s' % splitext(file)  # 保留扩展名，以免改变压缩格式。
+        try:
+            with open_text(temp, 'w') as f:
+                self._write(f, safe)
+            replace(temp, file)
+        except BaseException:
+            if isfile(temp):
+                remove(temp)
+            raise
+
+    def _write(self, f, safe: bool = False) -> None:
+        """将抽卡记录逐条写入文本文件对象，不在内存中拼接整个文档。"""
         # 这个函数只是为了dump一份格式好看一点的json文件而已，不到万不得已最好不要改动。
-        # 缩进采用两个空格。
+        # 缩进采用两个空格，每条抽卡记录占一行。
         obj = {
             "collector": {
                 "version": GachaPlayer.VERSION,
@@ -397,54 +692,251 @@ class GachaPlayer:
         }
         if safe:
             obj.pop('infos')
-        result = dumps(obj, ensure_ascii=False, indent=2)
+        frame = dumps(obj, ensure_ascii=False, indent=2)
+        start = 0
         for wish in self.wishes:
+            mark = f'"@({wish.wish_type})"'
+            end = frame.index(mark, start)
+            f.write(frame[start:end])
             if len(wish.records) != 0:
-                raw = dumps(wish.records, ensure_ascii=False)
-                raw = raw.replace('}, {', '},\n      {')
-                raw = raw.replace('[', '[\n      ')
-                raw = raw.replace(']', '\n    ]')
+                f.write('[\n      ')
+                records = iter(wish.records)
+                for i in range(0, len(wish.records), self._DUMP_CHUNK):
+                    if i > 0:
+                        f.write(',\n      ')
+                    chunk = map(_jsonable, islice(records, self._DUMP_CHUNK))
+                    f.write(',\n      '.join(map(_ENCODER.encode, chunk)))
+                f.write('\n    ]')
             else:
-                raw = '[]'
-            result = result.replace(f'"@({wish.wish_type})"', raw)
-        with open(file, 'w', encoding='UTF-8') as f:
-            f.write(result)
+                f.write('[]')
+            start = end + len(mark)
+        f.write(frame[start:])
 
-    def load(self, file: str) -> str:
+    _RECORDS_MARK = b'\n  "records": {'
+    """``dump()`` 写出的文件中抽卡记录部分的开头。"""
+
+    def load(self, file: str, lazy: bool = False) -> str:
         """从JSON格式文件中载入原神祈愿抽卡记录，并覆盖原有的数据。
 
+        经过 gzip 或 xz 压缩的文件会根据文件头自动识别并解压，与扩展名无关。
+
         :param file: 具体的文件地址。
+        :param lazy: 是否延迟载入抽卡记录。为 ``True`` 时只读取文件开头的元数据，
+                     每个祈愿卡池的抽卡记录在第一次访问时才从文件中解析，
+                     因此载入前后不应修改文件。不是由 ``dump()`` 保存的文件以及压缩文件会照常全部载入。
         :returns: 抽卡记录的采集器针对的游戏版本。失败返回空字符串。"""
-        ret = ''
-        with open(file, 'r', encoding='UTF-8') as f:
-            try:
-                obj = load(f)
-            except JSONDecodeError:
-                obj = dict()
+        ret = self._load_lazily(file) if lazy else None
+        if ret is None:
+            with open_text(file, 'r') as f:
+                try:
+                    obj = load(f)
+                except JSONDecodeError:
+                    obj = dict()
             if type(obj) is not dict:
-                return ret
-            if 'collector' in obj:
-                self.create = obj['collector'].get('create', '')
-                self.modify = obj['collector'].get('modify', '')
-                ret = obj['collector'].get('version', '')
-            if 'infos' in obj:
-                self.uid = obj['infos'].get('uid', '')
-                self.language = obj['infos'].get('lang', '')
-                self.region = obj['infos'].get('region', '')
-            if 'wishes' in obj:
-                for i in range(len(self.wishes)):
-                    self.wishes[i].wish_name = obj['wishes'][self.wishes[i].wish_type]
-            if 'records' in obj:
-                for i in range(len(self.wishes)):
-                    if self.wishes[i].wish_type in obj['records']:
-                        self.wishes[i].records = obj['records'][self.wishes[i].wish_type]
+                return ''
+            ret = self._read(obj)
+        self._replay(file)
+        return ret
+
+    def _read(self, obj: dict) -> str:
+        """从JSON对象中读取数据，返回采集器针对的游戏版本。"""
+        ret = ''
+        if 'collector' in obj:
+            self.create = obj['collector'].get('create', '')
+            self.modify = obj['collector'].get('modify', '')
+            ret = obj['collector'].get('version', '')
+        if 'infos' in obj:
+            self.uid = obj['infos'].get('uid', '')
+            self.language = obj['infos'].get('lang', '')
+            self.region = obj['infos'].get('region', '')
+            self._sync_infos()
+        if 'wishes' in obj:
+            for i in range(len(self.wishes)):
+                self.wishes[i].wish_name = obj['wishes'][self.wishes[i].wish_type]
+        if 'records' in obj:
+            for i in range(len(self.wishes)):
+                if self.wishes[i].wish_type in obj['records']:
+                    self.wishes[i].records = parse_ids(obj['records'][self.wishes[i].wish_type])
+        return ret
+
+    def _load_lazily(self, file: str) -> Union[str, None]:
+        """只读取文件开头的元数据，并让每个祈愿卡池延迟载入抽卡记录。
+
+        :return: 采集器针对的游戏版本。文件不是由 ``dump()`` 保存的时候返回 ``None`` 。
+        """
+        if is_compressed(file):
+            return None
+        mark = self._RECORDS_MARK
+        head = b''
+        with open(file, 'rb') as f:
+            while True:
+                chunk = f.read(1 << 16)
+                pos = (head + chunk).find(mark, max(0, len(head) - len(mark)))
+                head += chunk
+                if pos >= 0 or chunk == b'':
+                    break
+            signature = (fstat(f.fileno()).st_size, fstat(f.fileno()).st_mtime_ns)
+        if pos < 0:
+            return None
+        try:
+            obj = loads(head[:pos].rstrip().rstrip(b',').decode('UTF-8') + '\n}')  # 兼容 Windows 的 CRLF 换行。
+        except (JSONDecodeError, UnicodeDecodeError):
+            return None
+        if type(obj) is not dict:
+            return None
+        ret = self._read(obj)
+        for i in range(len(self.wishes)):
+            self.wishes[i].defer(partial(
+                self._load_records, file, pos + len(mark), self.wishes[i].wish_type, signature,
+            ))
         return ret
 
+    @staticmethod
+    def _load_records(file: str, start: int, wish_type: str, signature: Tuple[int, int]) -> List[dict]:
+        """从 ``dump()`` 保存的文件中解析某一祈愿卡池的抽卡记录。
+
+        记录部分的每个卡池以四个空格缩进的键开头、以四个空格缩进的 ``]`` 结尾，
+        而每条记录独占一行且缩进六个空格，因此不必解析整个文件就能找到卡池的范围。
+        查找的标记都以 ``\n`` 开头，在 Windows 上保存的 CRLF 换行的文件中同样能找到。
+        """
+        with open(file, 'rb') as f:
+            if (fstat(f.fileno()).st_size, fstat(f.fileno()).st_mtime_ns) != signature:
+                raise GenshinBaseException('延迟载入的抽卡记录文件已被修改：%s' % file)
+            with mmap(f.fileno(), 0, access=ACCESS_READ) as m:
+                key = b'\n    "%s": ' % wish_type.encode('UTF-8')
+                begin = m.find(key, start)
+                if begin < 0:
+                    return list()
+                begin += len(key)
+                if m[begin:begin + 2] == b'[]':
+                    return list()
+                end = m.find(b'\n    ]', begin) + len(b'\n    ]')
+                return parse_ids(loads(m[begin:end].decode('UTF-8')))
+
+    @staticmethod
+    def _journal_of(file: str, wish_type: str) -> str:
+        """存档 ``file`` 中某一祈愿卡池的追加日志的文件地址。"""
+        return '%s.%s.jsonl' % (file, wish_type)
+
+    def _replay(self, file: str) -> None:
+        """将存档 ``file`` 的追加日志中的记录合并到当前对象中。"""
+        for i in range(len(self.wishes)):
+            journal = self._journal_of(file, self.wishes[i].wish_type)
+            if not isfile(journal):
+                continue
+            records = []
+            with open(journal, 'r', encoding='UTF-8') as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except JSONDecodeError:
+                        continue  # 因中断而写了一半的行，跳过它而不影响其后的记录。
+                    if 'collector' in entry:
+                        self.modify = max(self.modify, entry['collector'].get('modify', ''))
+                        self.create = self.create or entry['collector'].get('create', '')
+                    else:
+                        records.append(entry)
+            self.wishes[i] += records
+
+    @staticmethod
+    def _truncate_journal(journal: str) -> None:
+        """截掉追加日志末尾因中断而写了一半的行，使之后追加的记录从新的一行开始。"""
+        with open(journal, 'r+b') as f:
+            end = pos = f.seek(0, SEEK_END)
+            while pos > 0:
+                step = min(pos, 1 << 12)
+                f.seek(pos - step)
+                found = f.read(step).rfind(b'\n')
+                if found != -1:
+                    pos += found + 1 - step
+                    break
+                pos -= step
+            if pos != end:
+                f.truncate(pos)
+
+    def append(self, file: str, threshold: int = 1 << 20) -> None:
+        """将当前对象中的抽卡记录追加到存档 ``file`` 的日志中，而不重写整个存档。
+
+        每个祈愿卡池有各自的 JSON Lines 格式的追加日志（``{file}.{gacha_type}.jsonl``），
+        每条记录占一行，因此写入的代价只取决于新增记录的数量。
+        ``load()`` 会自动将日志合并到存档中；日志的总大小超过 ``threshold`` 时则自动压实。
+
+        通常与增量同步搭配使用::
+
+            master = GachaPlayer(file=path)
+            branch.collect(since=master)
+            master += branch  # 检查TNF策略
+            branch.append(path)
+
+        存档不存在时直接保存为存档。
+
+        :param file: 存档的文件地址。
+        :param threshold: 日志总大小（字节）的上限。
+        """
+        if not isfile(file):
+            self.dump(file)
+            return
+        meta = dumps({'collector': {'create': self.create, 'modify': self.modify}}, ensure_ascii=False)
+        size = 0
+        for wish in self.wishes:
+            journal = self._journal_of(file, wish.wish_type)
+            if len(wish.records) != 0:
+                if isfile(journal):
+                    self._truncate_journal(journal)
+                with open(journal, 'a', encoding='UTF-8') as f:
+                    records = iter(wish.records)
+                    for i in range(0, len(wish.records), self._DUMP_CHUNK):
+                        chunk = map(_jsonable, islice(records, self._DUMP_CHUNK))
+                        f.write('\n'.join(map(_ENCODER.encode, chunk)) + '\n')
+                    f.write(meta + '\n')
+            if isfile(journal):
+                size += getsize(journal)
+        if size > threshold:
+            self.compact(file)
+
+    @classmethod
+    def compact(cls, file: str) -> None:
+        """将存档 ``file`` 的追加日志并入存档，然后删除日志。
+
+        新的存档先写入临时文件再替换原文件（见 ``dump()`` ），中途失败不会损坏原有的存档和日志。
+
+        :param file: 存档的文件地址。
+        """
+        player = cls(file=file)
+        player.dump(file)
+        for wish in player.wishes:
+            journal = cls._journal_of(file, wish.wish_type)
+            if isfile(journal):
+                remove(journal)
+
     def sort(self):
         """按时间戳和抽卡记录ID，对每一个祈愿卡池的抽卡数据进行排序。"""
         for i in range(len(self.wishes)):
             self.wishes[i].sort()
 
+    def pack(self):
+        """将所有祈愿卡池的抽卡记录转换为紧凑的 ``GachaRecord`` ，以节省内存。详见 ``GachaWish.pack()`` 。"""
+        for i in range(len(self.wishes)):
+            self.wishes[i].pack()
+
+    def unpack(self):
+        """将所有祈愿卡池的抽卡记录转换回 ``dict`` 。"""
+        for i in range(len(self.wishes)):
+            self.wishes[i].unpack()
+
+    def translate(self, language: str) -> int:
+        """将所有祈愿卡池的抽卡记录翻译为另一种语言文字，并修改 ``language`` 。详见 ``GachaWish.translate()`` 。
+
+        :param language: 目标语言文字。比如 ``'en-us'`` 。
+        :return: 无法翻译名称的记录数量。
+        """
+        missing = 0
+        for i in range(len(self.wishes)):
+            missing += self.wishes[i].translate(language)
+        self.language = language
+        self._sync_infos()
+        return missing
+
     @staticmethod
     def earliest() -> str:
         """当前版本的原神只能获取最近六个月的数据。
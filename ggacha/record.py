@@ -0,0 +1,106 @@
+from collections.abc import Mapping
+from operator import attrgetter
+from sys import intern
+from typing import Iterable, Iterator, List, Union
+
+from ggacha.common.time import format_time, parse_time
+
+
+class GachaRecord(Mapping):
+    __slots__ = ('id', 'stamp', 'name', 'item_type', 'rank_type')
+
+    KEYS = ('time', 'name', 'item_type', 'rank_type', 'id')
+    """抽卡记录的字段，顺序与保存到文件中的一致。"""
+
+    _GETTERS = {
+        'time': lambda r: format_time(r.stamp),
+        'name': attrgetter('name'),
+        'item_type': attrgetter('item_type'),
+        'rank_type': attrgetter('rank_type'),
+        'id': attrgetter('id'),
+    }
+
+    def __init__(self, time: str, name: str, item_type: str, rank_type: str, id: Union[str, int]) -> None:
+        """紧凑的单条抽卡记录。
+
+        ID以整数存储，抽卡时间以整数秒存储，名称、类别、星级则是驻留（intern）的字符串，
+        同一份字符串被所有记录共享。因此内存占用远小于等价的 ``dict`` 。
+
+        本类是只读的映射，``record['name']`` 、 ``record.get('id')`` 、 ``dict(record)`` 等用法
+        都与 ``dict`` 形式的抽卡记录一致，取出的值也相同（ID同样是整数）；与内容相同的 ``dict`` 比较时相等。
+        除了上述五个字段之外的字段不会被保留。
+        """
+        self.id = int(id)
+        """抽卡记录ID。"""
+
+        self.stamp = parse_time(time)
+        """抽卡时间。是将抽卡时间字符串视为UTC+0时间得到的整数秒，仅用于紧凑存储和比较先后。"""
+
+        self.name = intern(name)
+        """角色或武器的名称。"""
+
+        self.item_type = intern(item_type)
+        """类别（角色/武器）。"""
+
+        self.rank_type = intern(rank_type)
+        """星级。"""
+
+    def __repr__(self) -> str:
+        return '<%s %s %s>' % (self.__class__.__name__, self['time'], self.name)
+
+    def __getitem__(self, key: str):
+        try:
+            getter = self._GETTERS[key]
+        except KeyError:
+            raise KeyError(key) from None
+        return getter(self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def __len__(self) -> int:
+        return len(self.KEYS)
+
+    def __reduce__(self):
+        return self.__class__, tuple(self[key] for key in self.KEYS)
+
+    @classmethod
+    def from_dict(cls, record: Mapping) -> 'GachaRecord':
+        """从 ``dict`` 形式的抽卡记录构造。"""
+        if type(record) is cls:
+            return record
+        return cls(record['time'], record['name'], record['item_type'], record['rank_type'], record['id'])
+
+    def to_dict(self) -> dict:
+        """转换为 ``dict`` 形式的抽卡记录。"""
+        return {
+            'time': format_time(self.stamp),
+            'name': self.name,
+            'item_type': self.item_type,
+            'rank_type': self.rank_type,
+            'id': self.id,
+        }
+
+
+def parse_ids(records: List[dict]) -> List[dict]:
+    """就地将抽卡记录的ID从字符串转换为整数。
+
+    ID只在JSON文件、接口等外部数据中以字符串表示，载入或获取后即转换为整数，
+    以便排序、合并、建立索引时直接比较整数。
+
+    :return: 原来的 ``records`` 。
+    """
+    for record in records:
+        if type(record) is not GachaRecord and type(record['id']) is str:
+            record['id'] = int(record['id'])
+    return records
+
+
+def pack(records: Iterable[Mapping]) -> List[GachaRecord]:
+    """将抽卡记录全部转换为紧凑的 ``GachaRecord`` 。"""
+    return list(map(GachaRecord.from_dict, records))
+
+
+def unpack(records: Iterable[Mapping]) -> List[dict]:
+    """将抽卡记录全部转换为 ``dict`` 。"""
+    return [record.to_dict() if type(record) is GachaRecord else record for record in records]
@@ -1,22 +1,23 @@
-from ggacha.common.time import str_to_stamp
-from ggacha.res.histories import WISHES_HISTORY
-from ggacha.res.items import ITEMS
+from ggacha.res.catalog import Catalog, Resources
 
-for wish in WISHES_HISTORY:
-    if type(WISHES_HISTORY[wish]) is not list:
-        continue
+CATALOG = Catalog()
+"""默认的静态资源目录，本项目的各项功能都从这里读取静态资源。
 
-    # 根据时间字符串添加时间戳，方便各方法利用。
-    for i in range(len(WISHES_HISTORY[wish])):
-        # 这里分别是祈愿卡池的开始时间和结束时间：
-        WISHES_HISTORY[wish][i]['stamp'] = (
-            str_to_stamp(WISHES_HISTORY[wish][i]['time'][0]),
-            str_to_stamp(WISHES_HISTORY[wish][i]['time'][1]),
-        )
+默认使用内置的静态资源。长期运行的服务可以改用源码中的 ``resources`` 文件夹，修改文件之后重新载入，而不必重启::
 
-    # 将项目自定义编号替换为角色/武器的名称。
-    for i in range(len(WISHES_HISTORY[wish])):
-        name_list = list()
-        for item_id in WISHES_HISTORY[wish][i]['items']['up']:
-            name_list += ITEMS[item_id].values()
-        WISHES_HISTORY[wish][i]['items']['up'] = tuple(set(name_list))  # 利用集合的特性去重
+    ggacha.res.CATALOG.load('resources')
+    ...
+    ggacha.res.CATALOG.reload()
+"""
+
+
+def __getattr__(name: str):
+    # ``WISHES_HISTORY`` 、 ``ITEMS`` 和 ``VERSION`` 总是当前版本的静态资源，第一次访问时才载入。
+    # 注意 ``from ggacha.res import ITEMS`` 得到的是导入时的版本，重新载入之后不会改变。
+    if name == 'WISHES_HISTORY':
+        return CATALOG.histories
+    if name == 'ITEMS':
+        return CATALOG.items
+    if name == 'VERSION':
+        return CATALOG.version
+    raise AttributeError('module %r has no attribute %r' % (__name__, name))
@@ -0,0 +1,220 @@
+from glob import glob
+from itertools import count
+from json import load
+from marshal import dumps, loads
+from os import getpid, makedirs, remove, replace, stat
+from os.path import abspath, basename, dirname, join
+from threading import RLock
+from typing import NamedTuple, Tuple, Union
+from zlib import crc32
+import sys
+
+from ggacha.common.time import parse_offset, str_to_stamp
+
+_DIR = dirname(abspath(__file__))
+_SOURCES = ('catalog.py', 'histories.py', 'items.py')
+_RESOURCES = join(dirname(dirname(_DIR)), 'resources')  # 源码目录中的静态数据文件夹，安装后的包中没有。
+_CACHE_DIR = join(_DIR, '__pycache__')
+_FILES = ('wishes.json', 'items.json')
+
+_versions = count(1)  # 所有静态资源目录共用，不同目录、不同次载入的版本号不会重复。
+
+
+class Resources(NamedTuple):
+    """某一版本的静态资源。"""
+
+    version: int
+    """版本号。"""
+
+    histories: dict
+    """卡池历史，即添加了时间戳和UP物品名称的 ``WISHES_HISTORY`` 。"""
+
+    items: dict
+    """角色/武器信息，即 ``ITEMS`` 。"""
+
+
+def _digest() -> str:
+    """根据 ``res`` 模块和 ``resources/*.json`` 的内容计算缓存的键。"""
+    digest = 0
+    files = [join(_DIR, name) for name in _SOURCES] + sorted(glob(join(_RESOURCES, '*.json')))
+    for file in files:
+        try:
+            with open(file, 'rb') as f:
+                content = f.read()
+        except OSError:
+            continue
+        digest = crc32(content, crc32(basename(file).encode(), digest))
+    return '%08x' % digest
+
+
+def _build(histories: dict, items: dict) -> dict:
+    """为卡池历史添加时间戳和UP物品的名称。不修改传入的 ``histories`` ，而是返回新的卡池历史。"""
+    offset = parse_offset(histories['time_zone'])
+    result = dict()
+    for wish, value in histories.items():
+        if type(value) is not list:
+            result[wish] = value
+            continue
+
+        result[wish] = list()
+        for history in value:
+            # 将项目自定义编号替换为角色/武器的名称，原来的编号则另外保存。
+            name_list = list()
+            for item_id in history['items']['up']:
+                name_list += items[item_id].values()
+            result[wish].append(dict(
+                history,
+                # 根据时间字符串添加时间戳，方便各方法利用。这里分别是祈愿卡池的开始时间和结束时间：
+                stamp=(str_to_stamp(history['time'][0], offset), str_to_stamp(history['time'][1], offset)),
+                items=dict(
+                    history['items'],
+                    codes=tuple(history['items']['up']),
+                    up=tuple(set(name_list)),  # 利用集合的特性去重
+                ),
+            ))
+    return result
+
+
+def _load_builtin() -> Tuple[dict, dict]:
+    """载入内置的静态资源，即 ``histories.py`` 和 ``items.py`` 。
+
+    处理好的静态资源会以 ``marshal`` 格式缓存在 ``__pycache__`` 文件夹中（与 ``.pyc`` 文件相同），
+    缓存文件名包含资源内容的摘要，资源未变化时直接读取缓存，不必导入 ``histories.py`` 、 ``items.py`` 再逐条处理。
+    缓存无法读取或写入（比如只读的安装目录）时照常导入，不影响结果。
+    """
+    cache = join(_CACHE_DIR, 'resources.%s.marshal' % _digest())
+    try:
+        with open(cache, 'rb') as f:
+            return loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    from ggacha.res.histories import WISHES_HISTORY
+    from ggacha.res.items import ITEMS
+
+    data = _build(WISHES_HISTORY, ITEMS), ITEMS
+    if sys.dont_write_bytecode:
+        return data
+    try:
+        makedirs(_CACHE_DIR, exist_ok=True)
+        for old in glob(join(_CACHE_DIR, 'resources.*.marshal')):
+            remove(old)
+        temp = '%s.%i.tmp' % (cache, getpid())
+        with open(temp, 'wb') as f:
+            f.write(dumps(data))
+        replace(temp, cache)
+    except OSError:
+        pass
+    return data
+
+
+class Catalog:
+    def __init__(self, folder: str = '') -> None:
+        """可以在运行时重新载入的静态资源目录。
+
+        静态资源可以是内置的 ``histories.py`` 和 ``items.py`` ，它们不会变化；
+        也可以是一个与源码中 ``resources`` 格式相同、含有 ``wishes.json`` 和 ``items.json`` 的文件夹，
+        文件被修改（修改时间或大小变化）后，调用 ``reload()`` 即可重新载入，而不必重启程序。
+
+        每次载入都会得到一份新的 ``Resources`` ，带有新的版本号，并以一次赋值整体替换旧的，
+        因此读取者看到的卡池历史和物品信息总是属于同一版本。由静态资源派生的索引（见 ``ggacha.res.index`` ）
+        按版本号缓存，版本号改变之后在下一次访问时重建一次。
+
+        静态资源在第一次访问时才载入。
+
+        :param folder: 静态数据文件夹。空字符串表示使用内置的静态资源。
+        """
+        self.folder = folder
+        """静态数据文件夹。空字符串表示使用内置的静态资源。"""
+
+        self._resources = None  # type: Union[Resources, None]
+        self._signature = None
+        self._lock = RLock()
+
+    def __repr__(self) -> str:
+        return '<%s(%r) 版本：%s>' % (
+            self.__class__.__name__,
+            self.folder,
+            '未载入' if self._resources is None else self._resources.version,
+        )
+
+    @property
+    def resources(self) -> Resources:
+        """当前版本的静态资源。需要同时使用卡池历史和物品信息时，应当一次取出，以免两次读取之间被重新载入。"""
+        resources = self._resources
+        if resources is None:
+            with self._lock:
+                if self._resources is None:
+                    self._load()
+                resources = self._resources
+        return resources
+
+    @property
+    def version(self) -> int:
+        """当前静态资源的版本号。"""
+        return self.resources.version
+
+    @property
+    def histories(self) -> dict:
+        """当前版本的卡池历史。"""
+        return self.resources.histories
+
+    @property
+    def items(self) -> dict:
+        """当前版本的角色/武器信息。"""
+        return self.resources.items
+
+    def _stat(self) -> Tuple[Tuple[int, int], ...]:
+        result = []
+        for name in _FILES:
+            st = stat(join(self.folder, name))
+            result.append((st.st_mtime_ns, st.st_size))
+        return tuple(result)
+
+    def _load(self) -> None:
+        if self.folder == '':
+            signature = None
+            histories, items = _load_builtin()
+        else:
+            signature = self._stat()  # 先于读取文件，读取期间文件再被修改时，下一次检查仍会发现。
+            with open(join(self.folder, 'wishes.json'), encoding='UTF-8') as f:
+                histories = load(f)
+            with open(join(self.folder, 'items.json'), encoding='UTF-8') as f:
+                items = load(f)
+            histories = _build(histories, items)
+        self._resources = Resources(next(_versions), histories, items)
+        self._signature = signature
+
+    def load(self, folder: str = '') -> None:
+        """改用另一个静态数据文件夹，并立即载入。
+
+        :param folder: 静态数据文件夹。空字符串表示使用内置的静态资源。
+        :raise OSError: 文件无法读取。
+        :raise ValueError: 文件不是有效的JSON。
+        :raise KeyError: 卡池历史中的UP物品不存在。
+        """
+        with self._lock:
+            previous, self.folder = self.folder, folder
+            try:
+                self._load()
+            except BaseException:
+                self.folder = previous
+                raise
+
+    def reload(self, force: bool = False) -> bool:
+        """检查静态数据文件是否被修改，被修改时重新载入。
+
+        检查只需要读取两个文件的修改时间和大小，长期运行的服务可以频繁调用（比如每次请求之前或者定时调用）。
+        载入失败时（比如文件正在被编辑）抛出异常，并继续使用原来的静态资源，下次调用时再重试。
+
+        :param force: 是否不论文件有没有被修改都重新载入。
+        :return: 是否重新载入了。
+        :raise OSError: 文件无法读取。
+        :raise ValueError: 文件不是有效的JSON。
+        :raise KeyError: 卡池历史中的UP物品不存在。
+        """
+        with self._lock:
+            if not force and self._resources is not None and (self.folder == '' or self._stat() == self._signature):
+                return False
+            self._load()
+            return True
@@ -0,0 +1,231 @@
+from bisect import bisect_right
+from functools import wraps
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import ggacha.res as res
+from ggacha.res.catalog import Resources
+from ggacha.record import GachaRecord
+
+_cache = dict()
+_lock = Lock()
+
+ITEM_TYPES = {
+    'zh-cn': ('角色', '武器'),
+    'zh-tw': ('角色', '武器'),
+    'en-us': ('Character', 'Weapon'),
+    'ja-jp': ('キャラクター', '武器'),
+    'ko-kr': ('캐릭터', '무기'),
+}
+"""各语言文字中抽卡记录的物品类别（角色、武器）的写法，也是 ``translate()`` 支持的语言文字。"""
+
+
+def derived(func: Callable) -> Callable:
+    """将由静态资源派生的数据按资源版本号（见 ``ggacha.res.CATALOG`` ）缓存。
+
+    被装饰的函数的第一个参数是同一版本的静态资源 ``Resources`` ，由装饰器取出后传入，调用时不需要提供。
+    同一版本、同样的参数只计算一次；静态资源被重新载入后，旧版本的缓存一次性全部丢弃。
+    被缓存的结果由所有调用者共享，不应修改。
+    """
+
+    @wraps(func)
+    def wrapper(*args):
+        resources = res.CATALOG.resources
+        key = (resources.version, func.__name__, args)
+        try:
+            return _cache[key]
+        except KeyError:
+            pass
+        value = func(resources, *args)
+        with _lock:
+            if any(k[0] > key[0] for k in _cache):
+                return value  # 计算期间静态资源已被重新载入，不缓存旧版本的结果。
+            for k in [k for k in _cache if k[0] != key[0]]:
+                del _cache[k]
+            _cache[key] = value
+        return value
+
+    return wrapper
+
+
+class HistoryIndex:
+    def __init__(self, histories: Iterable[dict]) -> None:
+        """祈愿卡池历史的区间索引，用于查询某个时间点正在开放的卡池。
+
+        每条卡池历史的开放时间是闭区间 ``stamp`` （整数秒的时间戳）。所有区间的端点把时间轴切分为若干段，
+        每一段内开放的卡池是固定的，预先算好之后只需二分查找时间点所在的段即可。
+        同一时间开放的多个卡池（比如2.0以后同时开放的两个角色活动祈愿）会一起返回。
+
+        :param histories: 卡池历史。比如 ``WISHES_HISTORY['301']`` 。
+        """
+        self.histories = sorted(histories, key=lambda h: h['stamp'])
+        """按开放时间排序的卡池历史。"""
+
+        bounds = sorted({h['stamp'][0] for h in self.histories} | {h['stamp'][1] + 1 for h in self.histories})
+        self._bounds = bounds
+        self._segments = [
+            tuple(h for h in self.histories if h['stamp'][0] <= bound <= h['stamp'][1])
+            for bound in bounds
+        ]
+
+    def __repr__(self) -> str:
+        return '<%s 卡池数量：%i，分段数量：%i>' % (
+            self.__class__.__name__,
+            len(self.histories),
+            len(self._bounds),
+        )
+
+    def __len__(self) -> int:
+        return len(self.histories)
+
+    def at(self, stamp: float) -> Tuple[dict, ...]:
+        """查询某个时间点正在开放的卡池。
+
+        :param stamp: 时间戳。
+        :return: 正在开放的卡池历史。没有时为空元组。
+        """
+        i = bisect_right(self._bounds, stamp) - 1
+        return self._segments[i] if i >= 0 else ()
+
+    def annotate(self, stamps: Iterable[float]) -> List[Tuple[dict, ...]]:
+        """批量查询每个时间点正在开放的卡池。相同的时间点只查询一次。
+
+        :param stamps: 时间戳，比如一个祈愿卡池所有抽卡记录的抽卡时间。
+        :return: 一一对应的卡池历史元组。
+        """
+        memo = dict()
+        result = []
+        for stamp in stamps:
+            events = memo.get(stamp)
+            if events is None:
+                events = memo[stamp] = self.at(stamp)
+            result.append(events)
+        return result
+
+    def group(self, records: List[dict], stamps: Iterable[float]) -> List[Tuple[dict, List[dict]]]:
+        """将抽卡记录按卡池历史分组。
+
+        同时开放的多个卡池无法仅凭抽卡时间区分，因此这段时间的记录会同时归入这些卡池。
+
+        :param records: 抽卡记录。
+        :param stamps: 与抽卡记录一一对应的时间戳。
+        :return: 按开放时间排序的 ``(卡池历史, 抽卡记录列表)`` ，不包括没有抽卡记录的卡池。
+        """
+        groups = dict()  # type: Dict[int, List[dict]]
+        for record, events in zip(records, self.annotate(stamps)):
+            for event in events:
+                groups.setdefault(id(event), []).append(record)
+        return [(h, groups[id(h)]) for h in self.histories if id(h) in groups]
+
+
+def _histories(resources: Resources, wish_type: str) -> List[dict]:
+    histories = resources.histories.get(wish_type)
+    return histories if type(histories) is list else []
+
+
+@derived
+def history_index(resources: Resources, wish_type: str) -> HistoryIndex:
+    """获取某一祈愿卡池类型的卡池历史区间索引。没有卡池历史的类型得到一个空索引。"""
+    return HistoryIndex(_histories(resources, wish_type))
+
+
+@derived
+def up_index(resources: Resources, wish_type: str) -> Dict[str, Tuple[dict, ...]]:
+    """获取某一祈愿卡池类型的UP倒排索引。
+
+    :return: 以角色/武器名称（任意语言文字）为键、以该物品UP的卡池历史（按开放时间排序）为值的字典。
+    """
+    result = dict()
+    for history in sorted(_histories(resources, wish_type), key=lambda h: h['stamp']):
+        for name in history['items']['up']:
+            result.setdefault(name, []).append(history)
+    return {name: tuple(histories) for name, histories in result.items()}
+
+
+@derived
+def up_counts(resources: Resources, wish_type: str, language: str) -> Dict[str, int]:
+    """统计某一祈愿卡池类型中每个角色/武器UP的次数。
+
+    :param wish_type: 祈愿卡池类型。
+    :param language: 名称的语言文字，即 ``ITEMS`` 中每个物品的键名。缺少该语言名称的物品不会被统计。
+    :return: 以名称为键、UP次数为值的字典，按次数（其次按名称）从大到小排列。
+    """
+    counts = dict()
+    for history in _histories(resources, wish_type):
+        for code in history['items']['codes']:
+            counts[code] = counts.get(code, 0) + 1
+    items = resources.items
+    result = {items[code][language]: n for code, n in counts.items() if language in items[code]}
+    return dict(sorted(result.items(), key=lambda i: (i[1], i[0]), reverse=True))
+
+
+@derived
+def name_index(resources: Resources) -> Dict[str, str]:
+    """获取物品名称到项目自定义编号的反向索引。
+
+    :return: 以角色/武器名称（任意语言文字）为键、以 ``ITEMS`` 中的编号为值的字典。不包括空字符串（即缺少的名称）。
+    """
+    result = dict()
+    for code, names in resources.items.items():
+        for name in names.values():
+            if name != '':
+                result.setdefault(name, code)
+    return result
+
+
+@derived
+def translation_table(resources: Resources, language: str) -> Dict[str, str]:
+    """获取翻译到某一语言文字的物品名称翻译表。
+
+    :param language: 目标语言文字，即 ``ITEMS`` 中每个物品的键名。
+    :return: 以角色/武器名称（任意语言文字，包括目标语言文字本身）为键、以目标语言文字的名称为值的字典。
+             缺少目标语言文字名称的物品不包括在内。
+    """
+    result = dict()
+    for names in resources.items.values():
+        target = names.get(language, '')
+        if target == '':
+            continue
+        for name in names.values():
+            if name != '':
+                result.setdefault(name, target)
+    return result
+
+
+def _type_table(language: str) -> Dict[str, str]:
+    result = dict()
+    for types in ITEM_TYPES.values():
+        for i, item_type in enumerate(types):
+            result[item_type] = ITEM_TYPES[language][i]
+    return result
+
+
+def translate(records: List[dict], language: str) -> int:
+    """就地将抽卡记录中的角色/武器名称和物品类别翻译为另一种语言文字。
+
+    每条记录只需在预先算好的翻译表中查询名称和类别，而不必逐个物品、逐个语言文字地查找。
+    ``GachaRecord`` 是只读的，需要翻译时会被替换为新的记录。
+
+    :param records: 抽卡记录。可以混有不同语言文字的记录。
+    :param language: 目标语言文字。比如 ``'en-us'`` 。
+    :return: 无法翻译名称的记录数量。静态资源中没有该物品或者缺少目标语言文字的名称时，名称保持原样。
+    :raise ValueError: 不支持目标语言文字。
+    """
+    if language not in ITEM_TYPES:
+        raise ValueError('不支持的语言文字：%r' % language)
+    names = translation_table(language)
+    types = _type_table(language)
+    missing = 0
+    for i, record in enumerate(records):
+        name = names.get(record['name'])
+        if name is None:
+            name = record['name']
+            missing += 1
+        item_type = types.get(record['item_type'], record['item_type'])
+        if type(record) is GachaRecord:
+            if name != record.name or item_type != record.item_type:
+                records[i] = GachaRecord(record['time'], name, item_type, record.rank_type, record.id)
+        else:
+            record['name'] = name
+            record['item_type'] = item_type
+    return missing
@@ -0,0 +1,131 @@
+from json import loads
+from json.decoder import JSONDecodeError
+from random import random
+from threading import Lock
+from time import sleep
+
+from ggacha.throwable import CollectingError
+
+
+class GachaTransport:
+    RETCODE_VISIT_TOO_FREQUENTLY = -110
+    """接口因访问过于频繁而拒绝请求时返回的 retcode 。"""
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+    """需要重试的HTTP状态码。"""
+
+    def __init__(self,
+                 timeout: float = 10,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 backoff_max: float = 16,
+                 pool_size: int = 4,
+                 session=None,
+                 ) -> None:
+        """抽卡记录接口的HTTP传输层。
+
+        在同一个保持连接（keep-alive）的会话中发出所有请求，避免每一页记录都重新握手；
+        遇到网络错误、服务端错误或访问过于频繁时，按指数退避（带随机抖动）重试有限次数。
+
+        任何提供了 ``get_json(url)`` 方法的对象都可以代替本类传给 ``GachaPlayer`` ，
+        以便在测试中连接本地的替身服务器。
+
+        :param timeout: 每个请求的超时时间（秒）。
+        :param retries: 失败后最多重试的次数。
+        :param backoff: 第一次重试前等待的基础时间（秒），之后每次翻倍。
+        :param backoff_max: 两次重试之间最长的等待时间（秒）。
+        :param pool_size: 连接池的大小。并发获取时应不小于并发数。
+        :param session: 可选。自行配置的 ``requests.Session`` 。
+        """
+        self.timeout = timeout
+        """每个请求的超时时间（秒）。"""
+
+        self.retries = retries
+        """失败后最多重试的次数。"""
+
+        self.backoff = backoff
+        """第一次重试前等待的基础时间（秒）。"""
+
+        self.backoff_max = backoff_max
+        """两次重试之间最长的等待时间（秒）。"""
+
+        self.pool_size = pool_size
+        """连接池的大小。"""
+
+        self._session = session
+        self._lock = Lock()
+
+    def __repr__(self) -> str:
+        return '<%s 超时：%ss，重试：%i次，连接池：%i>' % (
+            self.__class__.__name__,
+            self.timeout,
+            self.retries,
+            self.pool_size,
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def session(self):
+        """保持连接的HTTP会话。首次使用时才创建。"""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    from requests import Session
+                    from requests.adapters import HTTPAdapter
+
+                    session = Session()
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def close(self) -> None:
+        """关闭会话并释放连接池中的所有连接。"""
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def _delay(self, attempt: int) -> float:
+        """第 ``attempt`` 次重试前需要等待的时间（全抖动指数退避）。"""
+        return random() * min(self.backoff_max, self.backoff * 2 ** attempt)
+
+    def get_json(self, url: str, encoding: str = 'UTF-8') -> dict:
+        """发出GET请求并将响应解析为JSON。
+
+        网络错误、需要重试的HTTP状态码、无法解析的响应以及访问过于频繁的 retcode 都会触发重试；
+        其它非零 retcode 会原样返回，交由调用者判断。
+
+        :param url: 请求地址。
+        :param encoding: 响应内容的编码。
+        :raises CollectingError: 重试次数用完后仍然失败。
+        """
+        from requests import RequestException
+
+        reason = ''
+        for attempt in range(self.retries + 1):
+            if attempt > 0:
+                sleep(self._delay(attempt - 1))
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except RequestException as e:
+                reason = '%s: %s' % (e.__class__.__name__, e)
+                continue
+            if response.status_code in self.RETRY_STATUS:
+                reason = 'HTTP %i' % response.status_code
+                continue
+            try:
+                content = loads(response.content.decode(encoding))
+            except (UnicodeDecodeError, JSONDecodeError) as e:
+                reason = '%s: %s' % (e.__class__.__name__, e)
+                continue
+            if type(content) is dict and content.get('retcode') == self.RETCODE_VISIT_TOO_FREQUENTLY:
+                reason = '(%s) %s' % (content['retcode'], content.get('message', ''))
+                continue
+            return content
+        raise CollectingError('请求数据失败，已重试 %i 次：%s' % (self.retries, reason))
@@ -1,8 +1,70 @@
-from datetime import datetime
-from typing import List, Dict, Union
+from itertools import chain, islice
+from operator import itemgetter, lt
+from typing import Callable, List, Dict, Tuple, Union
 
+from ggacha.common.time import format_times, parse_times, region_offset
+from ggacha.pity import PityEngine, PityState, PullPity
+from ggacha.record import GachaRecord, pack, parse_ids, unpack
 from ggacha.throwable import MultiRegionError, MultiLanguageError, MultiUIDError
-from ggacha.res import WISHES_HISTORY, ITEMS
+import ggacha.res as res
+from ggacha.res.index import history_index, translate, up_counts, up_index
+
+
+_MERGE_KEY = itemgetter('id', 'time')
+"""合并抽卡记录时的排序键。ID和抽卡时间都相同的记录视为重复。"""
+
+
+def _normalize(records: List[dict]) -> List[dict]:
+    """将抽卡记录整理为按合并排序键严格递增（即有序且无重复）的列表。
+
+    已经满足条件时原样返回，否则返回排序去重后的新列表，重复的记录保留最先出现的那一条。
+    """
+    keys = list(map(_MERGE_KEY, records))
+    if all(map(lt, keys, islice(keys, 1, None))):
+        return records
+    result = []
+    last = None
+    for i in sorted(range(len(keys)), key=keys.__getitem__):
+        if keys[i] != last:
+            result.append(records[i])
+            last = keys[i]
+    return result
+
+
+def _merge(records1: List[dict], records2: List[dict]) -> List[dict]:
+    """将 ``records2`` 合并到 ``records1`` 中。两者都必须按合并排序键严格递增。
+
+    只有 ``records1`` 中不早于 ``records2`` 第一条记录的部分（通常只是末尾的一小段）参与合并：
+    先用这一段的排序键建立散列索引剔除重复记录，剩下的新记录如果都比 ``records1`` 更晚就直接追加，
+    否则与这一段一起归并。因此代价是 O(n + m) ，新记录全部更晚时（比如增量同步）则只有 O(m) 。
+
+    :return: 就地修改后的 ``records1`` 。
+    """
+    if len(records2) == 0:
+        return records1
+    first = _MERGE_KEY(records2[0])
+    if len(records1) == 0 or _MERGE_KEY(records1[-1]) < first:
+        records1.extend(records2)
+        return records1
+    lo, hi = 0, len(records1)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _MERGE_KEY(records1[mid]) < first:
+            lo = mid + 1
+        else:
+            hi = mid
+    index = set(map(_MERGE_KEY, records1[lo:]))
+    fresh = [record for record in records2 if _MERGE_KEY(record) not in index]
+    if len(fresh) == 0:
+        return records1
+    if len(records1) == 0 or _MERGE_KEY(records1[-1]) < _MERGE_KEY(fresh[0]):
+        records1.extend(fresh)
+    else:
+        tail = records1[lo:] + fresh
+        tail.sort(key=_MERGE_KEY)  # 两段各自有序，Timsort 只需一次线性归并。
+        del records1[lo:]
+        records1.extend(tail)
+    return records1
 
 
 class GachaWish:
@@ -63,8 +125,15 @@ class GachaWish:
         考虑到多语言带来的复杂情况，这个值仅在获取抽卡记录时被动填充，其余时候仅作存储载体使用。
         """
 
-        self.records = list()
-        """当前祈愿卡池的所有抽取记录。"""
+        self._records = list()
+        self._loader = None  # 延迟载入抽卡记录的函数，见 defer() 。
+
+        # 上一次合并之后的修改次数和记录数量，两者都不变时记录必然仍是有序、无重复的：
+        self._merged_revision = None
+        self._merged_length = 0
+
+        self._revision = 0  # 抽卡记录被修改的次数，见 revision 。
+        self._pity = PityEngine(self)
 
         self.CEILING = {
             '100': 90,  # 新手祈愿
@@ -74,10 +143,6 @@ class GachaWish:
         }[self.wish_type]
         """五星角色/物品必定抽出的保底抽取次数。"""
 
-        if self.wish_type in WISHES_HISTORY:
-            self.histories = WISHES_HISTORY[self.wish_type]
-            """当前祈愿卡池的所有历史信息。"""
-
     def __repr__(self) -> str:
         return '<%s(%s) 记录数量：%i>' % (
             self.__class__.__name__,
@@ -101,38 +166,119 @@ class GachaWish:
     def __len__(self) -> int:
         return len(self.records)
 
-    def __iadd__(self, other):
+    @property
+    def histories(self) -> List[dict]:
+        """当前祈愿卡池的所有历史信息。没有历史信息的卡池类型（比如新手祈愿）没有这个属性。"""
+        try:
+            return res.WISHES_HISTORY[self.wish_type]
+        except KeyError:
+            raise AttributeError('histories') from None
 
-        def merge(records1, records2) -> List[dict]:
-            result = records1 + records2
-            result.sort(key=lambda e: (e['id'], e['time']))
-            for i in range(len(result) - 1, 0, -1):
-                if result[i]['id'] == result[i - 1]['id'] \
-                        and result[i]['time'] == result[i - 1]['time']:
-                    result.pop(i)
-            return result
+    @property
+    def records(self) -> List[dict]:
+        """当前祈愿卡池的所有抽取记录。
+
+        如果记录被延迟载入（见 ``defer()`` ），则在第一次访问时才真正载入。
+        """
+        if self._loader is not None:
+            loader, self._loader = self._loader, None
+            self._records = loader()
+        return self._records
+
+    @records.setter
+    def records(self, value: List[dict]) -> None:
+        self._loader = None
+        self._records = value
+        self._revision += 1
+
+    @property
+    def revision(self) -> int:
+        """抽卡记录的修改次数。
+
+        替换 ``records`` ，以及排序、翻译、转换时间等就地修改记录内容或顺序的操作都会使其增加；
+        合并时如果新记录都比原有的记录更晚、只是追加在末尾，则不会增加。
+        依赖抽卡记录的缓存（比如 ``WishColumns`` ）据此判断是否需要重建，合并时也据此判断是否需要重新排序、去重。
+        直接就地修改 ``records`` 之后，应当将其重新赋值给 ``records`` 来通知它们。
+        """
+        return self._revision
+
+    @property
+    def loaded(self) -> bool:
+        """抽卡记录是否已经载入。只有被延迟载入且尚未访问时才为 ``False`` 。"""
+        return self._loader is None
 
+    def defer(self, loader: Callable[[], List[dict]]) -> None:
+        """延迟载入抽卡记录：直到第一次访问 ``records`` 时才调用 ``loader`` 取得记录。
+
+        用于只需要元数据或个别卡池的场合，比如从大型存档中只读取一个卡池。
+
+        :param loader: 无参数的函数，返回当前卡池的所有抽取记录。只会被调用一次。
+        """
+        self._loader = loader
+        self._records = None
+        self._revision += 1
+
+    def _merge(self, records: List[dict]) -> None:
+        """将抽卡记录合并到当前卡池中，合并结果按ID（其次按时间）排序并去重。"""
+        # 上一次合并之后没有被修改或增删时，记录必然仍是有序的，不必再检查一遍：
+        if self.revision != self._merged_revision or len(self.records) != self._merged_length:
+            normalized = _normalize(parse_ids(self.records))
+            if normalized is not self.records:
+                self.records = normalized
+        if len(self.records) != 0 and type(self.records[0]) is GachaRecord:
+            records = pack(records)  # 保持紧凑。
+        length = len(self.records)
+        last = self.records[-1] if length != 0 else None
+        _merge(self.records, _normalize(parse_ids(records)))
+        if length != 0 and self.records[length - 1] is not last:
+            self._revision += 1  # 新记录插入到了原有记录之间，而不只是追加在末尾。
+        self._merged_revision = self._revision
+        self._merged_length = len(self.records)
+
+    def merge_many(self, others: List['GachaWish']) -> None:
+        """一次性将多个卡池的抽卡记录合并到当前卡池中。
+
+        效果与依次用 ``+=`` 合并相同，但所有记录只去重、排序一次：
+        先以合并排序键建立散列表去重（保留最先出现的记录），再对剩下的记录排序。
+        快照之间大量重叠时，需要排序的记录远少于记录总数。
+
+        :param others: 同一类型的多个祈愿卡池。
+        """
+        for other in others:
+            self._merge_infos(other)
+        records = parse_ids(list(chain(self.records, *[other.records for other in others])))
+        records.reverse()  # 逆序建表，使最先出现的记录覆盖后出现的记录。
+        index = dict(zip(map(_MERGE_KEY, records), records))
+        self.records = [index[key] for key in sorted(index)]
+        self._merged_revision = self._revision
+        self._merged_length = len(self.records)
+
+    def _merge_infos(self, other: 'GachaWish') -> None:
+        """按照TNF策略合并地区、语言文字和UID，并沿用对方的卡池名称。"""
+        if self.region != other.region:
+            if self.multi_region is True:
+                self.region = other.region
+            elif self.multi_region is False:
+                raise MultiRegionError(self.region, other.region)
+        if self.language != other.language:
+            if self.multi_language is True:
+                self.language = other.language
+            elif self.multi_language is False:
+                raise MultiLanguageError(self.language, other.language)
+        if self.uid != other.uid:
+            if self.multi_uid is True:
+                self.uid = other.uid
+            elif self.multi_uid is False:
+                raise MultiUIDError(self.uid, other.uid)
+        if other.wish_name != '':
+            self.wish_name = other.wish_name
+
+    def __iadd__(self, other):
         if type(other) is list:
-            self.records = merge(self.records, other)
+            self._merge(other)
         elif type(other) is self.__class__:
-            if self.region != other.region:
-                if self.multi_region is True:
-                    self.region = other.region
-                elif self.multi_region is False:
-                    raise MultiRegionError(self.region, other.region)
-            if self.language != other.language:
-                if self.multi_language is True:
-                    self.language = other.language
-                elif self.multi_language is False:
-                    raise MultiLanguageError(self.language, other.language)
-            if self.uid != other.uid:
-                if self.multi_uid is True:
-                    self.uid = other.uid
-                elif self.multi_uid is False:
-                    raise MultiUIDError(self.uid, other.uid)
-            if other.wish_name != '':
-                self.wish_name = other.wish_name
-            self.records = merge(self.records, other.records)
+            self._merge_infos(other)
+            self._merge(other.records)
         else:
             raise TypeError(
                 '仅支持与 list、%s 类型相加，而提供的是 %s' % (
@@ -147,53 +293,95 @@ class GachaWish:
         先按 ``time`` 字段排序，当 ``time`` 字段相同时再按 ``id`` 字段排序。
         """
         self.records.sort(key=lambda e: (e['time'], e['id']))
+        self._revision += 1
+        self._pity.reset()
+
+    def pack(self) -> None:
+        """将当前卡池的抽卡记录全部转换为紧凑的 ``GachaRecord`` ，以节省内存。
+
+        转换后排序、合并、聚合、保存等功能照常可用，但 ``t2stamp()`` 等需要修改记录内容的功能不再可用。
+        """
+        self.records = pack(self.records)
+
+    def unpack(self) -> None:
+        """将当前卡池的抽卡记录全部转换回 ``dict`` 。"""
+        self.records = unpack(self.records)
+
+    def translate(self, language: str) -> int:
+        """将当前卡池抽卡记录中的角色/武器名称和物品类别翻译为另一种语言文字，并修改 ``language`` 。
+
+        用不同语言文字获取的抽卡记录翻译为同一种语言文字之后，就可以直接合并，而不会引发 ``MultiLanguageError`` 。
+
+        :param language: 目标语言文字。比如 ``'en-us'`` 。
+        :return: 无法翻译名称的记录数量，这些记录的名称保持原样。
+        :raise ValueError: 不支持目标语言文字。
+        """
+        missing = translate(self.records, language)
+        self.language = language
+        self._revision += 1
+        self._pity.reset()
+        return missing
+
+    def pity(self) -> List[PullPity]:
+        """计算每一条抽卡记录的四星、五星保底抽数，以及抽出的四星、五星是否为UP、是否处于大保底。
+
+        结果会被缓存；合并之后如果只是增加了更晚的记录，只需计算新增的部分。
+
+        :return: 与 ``records`` 一一对应的保底信息。
+        """
+        return self._pity.pities()
+
+    def pity_state(self) -> PityState:
+        """获取当前的保底状态：已经垫了多少抽、下一个四星/五星是否必定为UP。"""
+        return self._pity.state()
+
+    def newest_id(self) -> Union[int, str]:
+        """获取当前卡池最新一条抽卡记录的ID。
+
+        抽卡记录ID随时间递增，因此ID最大的记录就是最新的记录。
+
+        :return: 抽卡记录ID（整数）。如果当前卡池没有抽卡记录，则返回空字符串。
+        """
+        if len(self.records) == 0:
+            return ''
+        return max((record['id'] for record in self.records), key=int)
 
     def t2stamp(self):
-        """将当前卡池内所有抽卡记录的抽卡时间字符串转换为时间戳（小数），以方便处理。
+        """将当前卡池内所有抽卡记录的抽卡时间字符串转换为时间戳（整数秒），以方便处理。
 
+        - 抽卡时间按照游戏地区 ``region`` 所在的时区解读。
         - 请确保 ``time`` 字段存在。
         - 如果 ``stamp`` 字段已经存在，则会被覆盖。
         """
-        for i in range(len(self.records)):
-            self.records[i]['stamp'] = datetime.strptime(
-                date_string=self.records[i].pop('time'),
-                format='%Y-%m-%d %H:%M:%S',
-            ).timestamp()
+        self._revision += 1
+        self._pity.reset()
+        stamps = parse_times((record['time'] for record in self.records), region_offset(self.region))
+        for record, stamp in zip(self.records, stamps):
+            del record['time']
+            record['stamp'] = stamp
 
     def stamp2t(self):
-        """将当前卡池内所有抽卡记录的时间戳（小数）转换为时间字符串。
+        """将当前卡池内所有抽卡记录的时间戳转换为时间字符串。
 
+        - 时间字符串按照游戏地区 ``region`` 所在的时区表示。
         - 请确保 ``stamp`` 字段存在。
         - 如果 ``time`` 字段已经存在，则会被覆盖。
         """
-        for i in range(len(self.records)):
-            self.records[i]['time'] = datetime.fromtimestamp(
-                self.records[i].pop('stamp')
-            ).strftime(
-                fmt='%Y-%m-%d %H:%M:%S',
-            )
+        self._revision += 1
+        self._pity.reset()
+        times = format_times((record['stamp'] for record in self.records), region_offset(self.region))
+        for record, time in zip(self.records, times):
+            del record['stamp']
+            record['time'] = time
 
     def count(self, language: str = 'zh-cn') -> dict:
         """统计角色/武器在当前卡池中up的次数。
 
         :param language: 角色/武器名称的语言。此参数就是 ``ITEMS`` 的键名。
-        :return: 返回一个字典，键为角色/武器的名称，值为up的累计次数。
+        :return: 返回一个字典，键为角色/武器的名称，值为up的累计次数，按次数从大到小排列。
                  如果当前卡池不存在up，则返回空字典。
         """
-        try:
-            id_list = dict(zip(ITEMS.keys(), [0] * len(ITEMS)))
-            histories = []
-            result = dict()
-            for item in WISHES_HISTORY[self.wish_type]:
-                histories += item['items']['up']
-            for history in histories:
-                id_list[history] += 1
-            for k in id_list:
-                if id_list[k] > 0:
-                    result[ITEMS[k][language]] = id_list[k]
-            return dict(sorted(result.items(), key=lambda i: (i[1], i[0]), reverse=True))
-        except KeyError:
-            return {}
+        return dict(up_counts(self.wish_type, language))
 
     def search(self, item_name: str, moment: float = None) -> list:
         """根据时间判断某个角色（某件武器）在哪些祈愿卡池中抽取概率提升（up）。
@@ -203,17 +391,31 @@ class GachaWish:
                           名称不应该包括前后缀，比如 “「逃跑的太阳·可莉」” 名称应为 “可莉” 。
                           名称的语言文字可以是任意的，因为这个取决于卡池历史记录是否包含这种文字的名称。
         """
-        history_list = list()
-        try:
-            for item in self.histories:
-                if moment is not None:
-                    if not (item['stamp'][0] <= moment <= item['stamp'][1]):
-                        continue
-                if item_name in item['items']['up']:
-                    history_list.append(item)
-        except (KeyError, AttributeError):
-            pass
-        return history_list
+        histories = up_index(self.wish_type).get(item_name, ())
+        if moment is not None:
+            histories = (h for h in histories if h['stamp'][0] <= moment <= h['stamp'][1])
+        return list(histories)
+
+    def annotate(self) -> List[Tuple[dict, ...]]:
+        """查询每一条抽卡记录是在哪个卡池历史期间抽取的。
+
+        抽卡时间按照游戏地区 ``region`` 所在的时区解读，每个不同的抽卡时间只需一次二分查找。
+
+        :return: 与 ``records`` 一一对应的卡池历史元组。
+                 同时开放的多个卡池会一起给出；找不到对应的卡池历史时为空元组。
+        """
+        stamps = parse_times((record['time'] for record in self.records), region_offset(self.region))
+        return history_index(self.wish_type).annotate(stamps)
+
+    def group_by_event(self) -> List[Tuple[dict, List[dict]]]:
+        """将当前卡池的抽卡记录按照 **卡池历史** 分组，比如 “杯装之诗” 期间的所有记录。
+
+        同时开放的多个卡池无法仅凭抽卡时间区分，因此这段时间的记录会同时归入这些卡池。
+
+        :return: 按开放时间排序的 ``(卡池历史, 抽卡记录列表)`` ，不包括没有抽卡记录的卡池。
+        """
+        stamps = parse_times((record['time'] for record in self.records), region_offset(self.region))
+        return history_index(self.wish_type).group(self.records, stamps)
 
     def group_by_time(self) -> Dict[str, List[dict]]:
         """将当前卡池的抽卡记录按照 **抽卡时间** 分组。
@@ -0,0 +1,64 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from ggacha import GachaPlayer
+
+
+def player(start: int, total: int) -> GachaPlayer:
+    result = GachaPlayer()
+    result.uid, result.language, result.region = '100000001', 'zh-cn', 'cn_gf01'
+    for wish in result.wishes:
+        if wish.wish_type == '200':
+            wish.records = [{
+                'time': '2021-01-01 %02d:%02d:00' % (i // 60 % 24, i % 60),
+                'name': '芭芭拉',
+                'item_type': '角色',
+                'rank_type': '4',
+                'id': 1609430400000000000 + i,
+            } for i in range(start, start + total)]
+    return result
+
+
+def count(file: str) -> int:
+    return sum(len(wish.records) for wish in GachaPlayer(file=file).wishes)
+
+
+class AppendTest(TestCase):
+    """追加日志中断之后，已经追加的和之后追加的记录都不能丢失。"""
+
+    def setUp(self) -> None:
+        self.folder = TemporaryDirectory()
+        self.file = join(self.folder.name, 'archive.json')
+        player(0, 100).dump(self.file)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def test_append(self) -> None:
+        player(100, 20).append(self.file)
+        player(120, 20).append(self.file)
+        self.assertEqual(count(self.file), 140)
+
+    def test_torn_line(self) -> None:
+        player(100, 20).append(self.file)
+        with open(GachaPlayer._journal_of(self.file, '200'), 'a', encoding='UTF-8') as f:
+            f.write('{"time": "2021-01-01 02:20:00", "na')  # 写到一半时中断。
+        player(120, 20).append(self.file)
+        self.assertEqual(count(self.file), 140)
+
+    def test_torn_middle(self) -> None:
+        player(100, 20).append(self.file)
+        with open(GachaPlayer._journal_of(self.file, '200'), 'a', encoding='UTF-8') as f:
+            f.write('{"time": "2021-01-01 02:20:00", "na\n')  # 旧版本在写了一半的行之后追加的日志。
+        player(120, 20).append(self.file)
+        self.assertEqual(count(self.file), 140)
+
+    def test_compact(self) -> None:
+        player(100, 20).append(self.file)
+        GachaPlayer.compact(self.file)
+        self.assertEqual(count(self.file), 120)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from ggacha.checkpoint import Checkpoint
+
+
+def page(uid: str, page_number: int) -> list:
+    return [{'uid': uid, 'id': str(page_number * 100 + i)} for i in range(5)]
+
+
+class CheckpointTest(TestCase):
+    """中断之后续写的检查点日志必须仍然可以完整读取。"""
+
+    def setUp(self) -> None:
+        self.folder = TemporaryDirectory()
+        self.file = join(self.folder.name, 'checkpoint.jsonl')
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def checkpoint(self) -> Checkpoint:
+        return Checkpoint(self.file, 'zh-cn', 'cn_gf01', '100000001', {'200': '0'})
+
+    def test_resume(self) -> None:
+        checkpoint = self.checkpoint()
+        checkpoint.open()
+        checkpoint.append('200', 1, '100', page('100000001', 1))
+        checkpoint.append('200', 2, '200', page('100000001', 2))
+
+        progress = self.checkpoint().read()
+        self.assertEqual(progress['200'].page, 2)
+        self.assertEqual(len(progress['200'].records), 10)
+
+    def test_torn_line(self) -> None:
+        checkpoint = self.checkpoint()
+        checkpoint.open()
+        checkpoint.append('200', 1, '100', page('100000001', 1))
+        with open(self.file, 'a', encoding='UTF-8') as f:
+            f.write('{"wish": "200", "page": 2, "end_id": ')  # 写到一半时中断。
+
+        checkpoint = self.checkpoint()
+        self.assertEqual(checkpoint.read()['200'].page, 1)
+        checkpoint.open()
+        checkpoint.append('200', 2, '200', page('100000001', 2))
+        checkpoint.append('200', 3, '300', page('100000001', 3))
+
+        progress = self.checkpoint().read()
+        self.assertEqual(progress['200'].page, 3)
+        self.assertEqual(len(progress['200'].records), 15)
+
+    def test_other_account(self) -> None:
+        checkpoint = self.checkpoint()
+        checkpoint.open()
+        checkpoint.append('200', 1, '100', page('100000002', 1))
+        self.assertEqual(self.checkpoint().read(), dict())
+
+
+if __name__ == '__main__':
+    main()
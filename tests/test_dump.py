@@ -0,0 +1,104 @@
+from json import dumps
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from ggacha import GachaPlayer
+
+
+def legacy_dump(player: GachaPlayer, records: dict, safe: bool = False) -> str:
+    """最初版本的 ``GachaPlayer.dump()`` ：在内存中拼接整个文档。用作比对的基准。
+
+    :param records: ``{gacha_type: [抽卡记录, ...]}`` ，ID是字符串，即最初版本在内存中的形式。
+    """
+    obj = {
+        "collector": {
+            "version": GachaPlayer.VERSION,
+            "create": player.create,
+            "modify": player.modify,
+        },
+        "infos": {
+            "uid": player.uid,
+            "lang": player.language,
+            "region": player.region,
+        },
+        "wishes": player.map_wishes(),
+        "records": {wish.wish_type: f'@({wish.wish_type})' for wish in player.wishes},
+    }
+    if safe:
+        obj.pop('infos')
+    result = dumps(obj, ensure_ascii=False, indent=2)
+    for wish in player.wishes:
+        if len(records.get(wish.wish_type, [])) != 0:
+            raw = dumps(records[wish.wish_type], ensure_ascii=False)
+            raw = raw.replace('}, {', '},\n      {')
+            raw = raw.replace('[', '[\n      ')
+            raw = raw.replace(']', '\n    ]')
+        else:
+            raw = '[]'
+        result = result.replace(f'"@({wish.wish_type})"', raw)
+    return result
+
+
+def synthesize(gacha_type: str, total: int) -> list:
+    return [{
+        'time': '2021-%02d-%02d %02d:%02d:00' % (i // 2000 % 12 + 1, i // 80 % 28 + 1, i // 60 % 24, i % 60),
+        'name': '芭芭拉' if i % 7 else 'Barbara',
+        'item_type': '角色' if i % 3 else '武器',
+        'rank_type': '345'[i % 3],
+        'id': str(1609430400000000000 + int(gacha_type) * 1000000 + i),
+    } for i in range(total)]
+
+
+class DumpCompatibilityTest(TestCase):
+    """``dump()`` 的输出必须与最初版本逐字节一致。"""
+
+    def setUp(self) -> None:
+        self.folder = TemporaryDirectory()
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def player(self, totals: dict) -> GachaPlayer:
+        player = GachaPlayer()
+        player.uid, player.language, player.region = '100000001', 'zh-cn', 'cn_gf01'
+        player.create, player.modify = '2021-01-01 00:00:00 UTC+0', '2021-02-01 00:00:00 UTC+0'
+        for wish in player.wishes:
+            wish.wish_name = str(wish)
+            wish.records = synthesize(wish.wish_type, totals.get(wish.wish_type, 0))
+            for record in wish.records:
+                record['id'] = int(record['id'])  # 与载入、获取之后的形式相同。
+        return player
+
+    def assertDumpEqual(self, totals: dict, safe: bool = False) -> None:
+        player = self.player(totals)
+        expected = legacy_dump(player, {t: synthesize(t, n) for t, n in totals.items()}, safe)
+        file = join(self.folder.name, 'dump.json')
+        player.dump(file, safe=safe)
+        with open(file, 'r', encoding='UTF-8') as f:
+            self.assertEqual(f.read(), expected)
+
+    def test_dump(self) -> None:
+        self.assertDumpEqual({'100': 20, '200': 1500, '301': 513, '302': 512})
+
+    def test_safe(self) -> None:
+        self.assertDumpEqual({'200': 30, '301': 1025}, safe=True)
+
+    def test_empty(self) -> None:
+        self.assertDumpEqual({})
+
+    def test_lazy_self(self) -> None:
+        """延迟载入的存档保存回它自己的文件时，尚未载入的抽卡记录不能丢失。"""
+        totals = {'100': 20, '200': 1500, '301': 513, '302': 512}
+        file = join(self.folder.name, 'self.json')
+        self.player(totals).dump(file)
+        player = GachaPlayer(file=file, lazy=True)
+        player.modify = '2021-03-01 00:00:00 UTC+0'
+        player.dump(file)
+        reloaded = GachaPlayer(file=file)
+        self.assertEqual(reloaded.modify, player.modify)
+        self.assertEqual({wish.wish_type: len(wish.records) for wish in reloaded.wishes}, totals)
+
+
+if __name__ == '__main__':
+    main()
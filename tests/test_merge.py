@@ -0,0 +1,90 @@
+from unittest import TestCase, main
+
+from ggacha import GachaWish
+
+
+def record(i: int, minute: int = None) -> dict:
+    return {
+        'time': '2021-01-01 00:%02d:00' % (i if minute is None else minute),
+        'name': '芭芭拉',
+        'item_type': '角色',
+        'rank_type': '4',
+        'id': 1000 + i,
+    }
+
+
+def ids(wish: GachaWish) -> list:
+    return [r['id'] - 1000 for r in wish.records]
+
+
+class MergeTest(TestCase):
+    """合并结果必须按ID排序并去重，不论之前的记录经过了怎样的修改。"""
+
+    def setUp(self) -> None:
+        self.wish = GachaWish(gacha_type='200')
+
+    def test_merge(self) -> None:
+        self.wish += [record(i) for i in (3, 1, 4, 1, 0)]
+        self.wish += [record(i) for i in (2, 4, 5)]
+        self.assertEqual(ids(self.wish), [0, 1, 2, 3, 4, 5])
+
+    def test_append(self) -> None:
+        self.wish += [record(i) for i in range(5)]
+        self.wish += [record(i) for i in range(5, 10)]
+        self.wish += [record(i) for i in range(8, 12)]
+        self.assertEqual(ids(self.wish), list(range(12)))
+
+    def test_keep_existing(self) -> None:
+        self.wish += [dict(record(i), name='钟剑') for i in range(3)]
+        self.wish += [record(i) for i in range(5)]
+        self.assertEqual([r['name'] for r in self.wish.records], ['钟剑'] * 3 + ['芭芭拉'] * 2)
+
+    def test_reassign_reversed(self) -> None:
+        self.wish += [record(i) for i in range(5)]
+        self.wish.records.reverse()
+        self.wish.records = self.wish.records
+        self.wish += [record(2)]
+        self.assertEqual(ids(self.wish), [0, 1, 2, 3, 4])
+
+    def test_reassign_replaced(self) -> None:
+        self.wish += [record(i) for i in range(5)]
+        self.wish.records[0] = record(3)
+        self.wish.records = self.wish.records
+        self.wish += [record(5)]
+        self.assertEqual(ids(self.wish), [1, 2, 3, 4, 5])
+
+    def test_sort(self) -> None:
+        self.wish += [record(i, 9 - i) for i in range(5)]
+        self.wish.sort()
+        self.wish += [record(5, 0)]
+        self.assertEqual(ids(self.wish), [0, 1, 2, 3, 4, 5])
+
+    def test_deferred(self) -> None:
+        self.wish += [record(i) for i in range(3)]
+        self.wish.defer(lambda: [record(i) for i in (4, 2, 3)])
+        self.wish += [record(1)]
+        self.assertEqual(ids(self.wish), [1, 2, 3, 4])
+
+    def test_packed(self) -> None:
+        self.wish += [record(i) for i in (0, 2, 4)]
+        self.wish.pack()
+        self.wish += [record(i) for i in (1, 2, 3)]
+        self.assertEqual(ids(self.wish), [0, 1, 2, 3, 4])
+
+    def test_merge_many(self) -> None:
+        others = [GachaWish(gacha_type='200') for _ in range(3)]
+        for n, other in enumerate(others):
+            other.records = [record(i) for i in range(n * 3, n * 3 + 5)]
+        self.wish.records = [record(i) for i in (12, 1)]
+        expected = GachaWish(gacha_type='200')
+        expected += self.wish
+        for other in others:
+            expected += other
+        self.wish.merge_many(others)
+        self.assertEqual(ids(self.wish), ids(expected))
+        self.wish += [record(0)]
+        self.assertEqual(ids(self.wish), ids(expected))
+
+
+if __name__ == '__main__':
+    main()
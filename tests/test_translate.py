@@ -0,0 +1,52 @@
+from os.path import join
+from tempfile import TemporaryDirectory
+from unittest import TestCase, main
+
+from ggacha import GachaPlayer
+from ggacha.throwable import MultiLanguageError
+
+
+class TranslateTest(TestCase):
+    """翻译为同一种语言文字之后，抽卡记录可以直接合并。"""
+
+    def setUp(self) -> None:
+        self.folder = TemporaryDirectory()
+        self.file = join(self.folder.name, 'archive.json')
+        player = GachaPlayer()
+        player.uid, player.language, player.region = '100000001', 'zh-cn', 'cn_gf01'
+        for wish in player.wishes:
+            wish.records = [{
+                'time': '2021-01-01 00:%02d:00' % i,
+                'name': '钟剑' if i % 2 else '芭芭拉',
+                'item_type': '武器' if i % 2 else '角色',
+                'rank_type': '3' if i % 2 else '4',
+                'id': int(wish.wish_type) * 100 + i,
+            } for i in range(10)]
+        player.dump(self.file)
+
+    def tearDown(self) -> None:
+        self.folder.cleanup()
+
+    def test_merge_translated(self) -> None:
+        master = GachaPlayer(file=self.file)
+        branch = GachaPlayer(file=self.file)
+        self.assertEqual(branch.translate('en-us'), 0)
+        self.assertEqual(branch.translate('zh-cn'), 0)
+        master += branch
+        self.assertEqual([len(wish.records) for wish in master.wishes], [10] * 4)
+        self.assertEqual(master.wishes[0].records[1]['name'], '钟剑')
+
+    def test_merge_other_language(self) -> None:
+        master = GachaPlayer(file=self.file)
+        branch = GachaPlayer(file=self.file)
+        branch.translate('en-us')
+        with self.assertRaises(MultiLanguageError):
+            master += branch
+        master.translate('en-us')
+        master += branch
+        self.assertEqual(master.language, 'en-us')
+        self.assertEqual({wish.language for wish in master.wishes}, {'en-us'})
+
+
+if __name__ == '__main__':
+    main()